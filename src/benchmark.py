@@ -0,0 +1,254 @@
+"""
+Pipeline Benchmark
+Measure throughput and per-stage latency of the recognition pipeline over a
+fixed corpus of car images, save the results as JSON and compare them
+against a baseline run.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core.metrics import PipelineMetrics
+from core.pipeline import GateAccessController
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+PERCENTILES = (50, 95, 99)
+
+
+class SampleRecorder(PipelineMetrics):
+    """PipelineMetrics keeping every sample, for exact percentiles"""
+
+    def __init__(self):
+        super().__init__()
+        self.samples = {}
+
+    def observe(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def reset(self):
+        super().reset()
+        self.samples = {}
+
+
+def load_corpus(corpus_dir, limit=None):
+    """Decode the corpus images in name order, with a fingerprint of the files"""
+    paths = sorted(
+        path
+        for path in Path(corpus_dir).iterdir()
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    )[:limit]
+
+    digest = hashlib.sha256()
+    images = []
+    for path in paths:
+        data = path.read_bytes()
+        digest.update(path.name.encode("utf-8"))
+        digest.update(hashlib.sha256(data).digest())
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode corpus image: {path}")
+        images.append(image)
+
+    if not images:
+        raise ValueError(f"No images found in {corpus_dir}")
+    return images, digest.hexdigest()
+
+
+def summarize(samples):
+    """Latency summary of a list of durations, in milliseconds"""
+    values = np.asarray(samples) * 1e3
+    summary = {"count": int(len(values)), "mean": float(values.mean())}
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{q}"] = float(value)
+    return summary
+
+
+def run_benchmark(controller, images, warmup=1, repeats=5):
+    """
+    Time repeated passes over the images
+
+    The warmup passes are not recorded. Each measured pass gives one
+    throughput figure, and every image of every pass contributes a latency
+    sample to the whole pipeline and to each stage it reaches.
+    """
+    recorder = SampleRecorder()
+    controller.metrics = None
+    for _ in range(warmup):
+        for image in images:
+            controller.process_image(image)
+
+    controller.metrics = recorder
+    throughputs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for image in images:
+            controller.process_image(image)
+        throughputs.append(len(images) / (time.perf_counter() - start))
+    controller.metrics = None
+
+    outcomes = recorder.snapshot()["counters"].get("results", {})
+
+    return {
+        "throughput": {
+            "median": float(np.median(throughputs)),
+            "min": float(np.min(throughputs)),
+            "max": float(np.max(throughputs)),
+            "runs": throughputs,
+        },
+        "stages": {
+            stage: summarize(samples)
+            for stage, samples in sorted(recorder.samples.items())
+        },
+        "outcomes": {
+            label: value // repeats for label, value in sorted(outcomes.items())
+        },
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+    }
+
+
+def compare(result, baseline, threshold):
+    """
+    Relative changes against a baseline, and the ones beyond threshold
+
+    Throughput regresses when it drops, and the whole-pipeline p50 and p95
+    regress when they rise, by more than threshold (a fraction). Stage
+    latencies are reported but do not fail the run, since short stages are
+    too noisy to gate on.
+    """
+    changes = {}
+    regressions = []
+
+    def relative(new, old):
+        return (new - old) / old if old else 0.0
+
+    change = relative(result["throughput"]["median"], baseline["throughput"]["median"])
+    changes["throughput"] = change
+    if change < -threshold:
+        regressions.append(f"throughput dropped by {-change:.1%}")
+
+    for stage, summary in result["stages"].items():
+        old = baseline["stages"].get(stage)
+        if old is None:
+            continue
+        for q in ("p50", "p95"):
+            change = relative(summary[q], old[q])
+            changes[f"{stage}.{q}"] = change
+            if stage == "total" and change > threshold:
+                regressions.append(f"total {q} latency rose by {change:.1%}")
+
+    return changes, regressions
+
+
+def print_report(result, changes):
+    throughput = result["throughput"]
+    print(
+        f"{result['corpus']['images']} images x {result['config']['repeats']} runs: "
+        f"{throughput['median']:.1f} images/s "
+        f"(min {throughput['min']:.1f}, max {throughput['max']:.1f})"
+    )
+    print(f"{'stage':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, summary in result["stages"].items():
+        line = (
+            f"{stage:<16}{summary['count']:>8}{summary['mean']:>10.2f}"
+            f"{summary['p50']:>10.2f}{summary['p95']:>10.2f}{summary['p99']:>10.2f}"
+        )
+        if f"{stage}.p50" in changes:
+            line += f"  p50 {changes[f'{stage}.p50']:+.1%}"
+        print(line)
+    print(f"Outcomes per run: {result['outcomes']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the recognition pipeline over a fixed image corpus"
+    )
+    parser.add_argument(
+        "--corpus", default=ROOT_DIR / "dataset", help="Directory of car images"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Only use the first N images"
+    )
+    parser.add_argument(
+        "--model",
+        default=ROOT_DIR / "data" / "models" / "model_svm.npz",
+        help="OCR model to load",
+    )
+    parser.add_argument("--warmup", type=int, default=1, help="Unrecorded passes")
+    parser.add_argument("--repeats", type=int, default=5, help="Measured passes")
+    parser.add_argument("--threads", type=int, default=None, help="OpenCV thread count")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed relative regression against the baseline (default 0.10)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    images, fingerprint = load_corpus(args.corpus, args.limit)
+    controller = GateAccessController(model_path=str(args.model))
+    controller.logger.setLevel(logging.WARNING)
+
+    result = {
+        "version": 1,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "corpus": {
+            "path": str(args.corpus),
+            "images": len(images),
+            "fingerprint": fingerprint,
+        },
+        "config": {"warmup": args.warmup, "repeats": args.repeats},
+        **run_benchmark(controller, images, args.warmup, args.repeats),
+    }
+
+    changes, regressions = {}, []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline["corpus"]["fingerprint"] != fingerprint:
+            print("Warning: the baseline was measured on a different corpus")
+        changes, regressions = compare(result, baseline, args.threshold)
+        result["baseline"] = {"path": args.baseline, "changes": changes}
+
+    print_report(result, changes)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+    if regressions:
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+Cerberus
+Headless command line for gate boxes: recognize a live stream, a directory
+of images, or images posted over HTTP. Only the standard library is
+imported up front; each command imports the pipeline when it runs, and
+--import-times reports what those imports cost per module.
+"""
+
+import argparse
+import builtins
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+STARTED = time.perf_counter()
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PLATES_DB = ROOT_DIR / "data" / "authorized_plates.db"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+class ImportTimer:
+    """
+    Time the modules imported while installed, like python -X importtime
+
+    Each import statement that loads new modules is timed as a whole
+    (cumulative) and without the imports nested in it (self). Modules
+    loaded through importlib directly count towards the import around
+    them; python -X importtime gives the complete tree.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self._original = None
+        self._children = []
+
+    def install(self) -> "ImportTimer":
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module = name
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                module = importlib.util.resolve_name("." * level + name, package)
+            except ImportError:
+                pass
+        if module in sys.modules and not fromlist:
+            return self._original(name, globals, locals, fromlist, level)
+
+        loaded = len(sys.modules)
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            if len(sys.modules) > loaded:
+                submodules = [f"{module}.{item}" for item in fromlist or ()]
+                label = next((m for m in submodules if m in sys.modules), module)
+                self.times[label] = (elapsed, elapsed - nested)
+
+    def report(self, limit: int = 25, file=sys.stderr) -> None:
+        print(f"{'module':<48}{'cumulative ms':>15}{'self ms':>10}", file=file)
+        ranked = sorted(self.times.items(), key=lambda item: -item[1][0])
+        for module, (cumulative, own) in ranked[:limit]:
+            row = f"{module:<48}{cumulative * 1e3:>15.1f}{own * 1e3:>10.1f}"
+            print(row, file=file)
+        total = sum(own for _, own in self.times.values())
+        print(f"{len(self.times)} imports, {total * 1e3:.1f} ms", file=file)
+
+
+def _since_start() -> str:
+    return f"{(time.perf_counter() - STARTED) * 1e3:.0f} ms"
+
+
+def _started(args, event: str) -> None:
+    """Report reaching the command's first output, with import times once"""
+    print(f"{event} after {_since_start()}", file=sys.stderr)
+    timer = getattr(args, "import_timer", None)
+    if timer is not None:
+        timer.uninstall()
+        timer.report()
+        args.import_timer = None
+
+
+def _build_controller(args, **options):
+    import logging
+
+    from core.authorization import MemoryAuthorizationStore, SQLiteAuthorizationStore
+    from core.pipeline import GateAccessController
+    from utils.arabic_plate_translator import ARABIC_TRANSLATION_MAP
+
+    # The controller resets its logger's level, so filter at the handler,
+    # which it leaves alone once the logger has one
+    handler = logging.StreamHandler()
+    handler.setLevel(getattr(logging, args.log_level.upper()))
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+    logging.getLogger("GateAccessControl").addHandler(handler)
+
+    store = (
+        MemoryAuthorizationStore(args.plate)
+        if args.plate
+        else SQLiteAuthorizationStore(args.plates_db)
+    )
+    return GateAccessController(
+        model_path=args.model,
+        translation_map=ARABIC_TRANSLATION_MAP,
+        authorization_store=store,
+        **options,
+    )
+
+
+def _print_json(record) -> None:
+    print(json.dumps(record, ensure_ascii=False), flush=True)
+
+
+def run_stream(args) -> int:
+    from core.metrics import PipelineMetrics
+    from core.motion_gate import MotionGate
+    from core.plate_voting import PlateVoter
+    from core.result_cache import PlateResultCache
+    from core.streaming import StreamingPipeline
+
+    metrics = PipelineMetrics() if args.metrics_port is not None else None
+    controller = _build_controller(
+        args,
+        track_plates=args.track,
+        result_cache=PlateResultCache() if args.cache else None,
+        metrics=metrics,
+    )
+    if metrics is not None:
+        metrics.serve(args.metrics_port)
+
+    decided = []
+
+    def on_result(stream_result):
+        if stream_result.plate_text is None:
+            return
+        if not decided:
+            _started(args, "First decision")
+        decided.append(stream_result)
+        _print_json(
+            {
+                "time": time.time(),
+                "plate": stream_result.plate_text,
+                "access_granted": stream_result.access_granted,
+                "frames_used": (
+                    stream_result.decision.frames_used
+                    if stream_result.decision is not None
+                    else 1
+                ),
+                "latency": stream_result.latency,
+            }
+        )
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    pipeline = StreamingPipeline(
+        controller,
+        source,
+        queue_size=args.queue_size,
+        drop_policy=args.drop_policy,
+        on_result=on_result,
+        motion_gate=MotionGate() if args.motion_gate else None,
+        voter=PlateVoter() if args.vote else None,
+    ).start()
+    try:
+        pipeline.join()
+    except KeyboardInterrupt:
+        pipeline.stop()
+        pipeline.join()
+
+    stats = pipeline.stats()
+    print(
+        f"{stats.frames_captured} frames, {stats.frames_completed} recognized, "
+        f"{len(decided)} decisions",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def process_dir(args) -> int:
+    paths = sorted(
+        path
+        for path in Path(args.directory).iterdir()
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    )
+    controller = _build_controller(args)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    recognized = 0
+    try:
+        for index, result in enumerate(
+            controller.process_batch(paths, workers=args.workers)
+        ):
+            if index == 0:
+                _started(args, "First result")
+            record = {"image": str(paths[index]), **result.to_dict()}
+            record["access_granted"] = result.plate_text is not None and (
+                controller.verify_access(result.plate_text)
+            )
+            recognized += result.success
+            print(json.dumps(record, ensure_ascii=False), file=output, flush=True)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        f"{recognized} of {len(paths)} images recognized in {_since_start()}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def serve(args) -> int:
+    import asyncio
+
+    from core.service import RecognitionService
+
+    service = RecognitionService(
+        _build_controller(args),
+        args.host,
+        args.port,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+    )
+
+    async def run():
+        await service.start()
+        _started(args, f"Serving on http://{service.host}:{service.port}")
+        await service.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="cerberus", description="Headless gate access recognition"
+    )
+    parser.add_argument(
+        "--import-times",
+        action="store_true",
+        help="Report the time spent importing each module",
+    )
+    parser.add_argument(
+        "--log-level", default="warning", help="Pipeline log level (default warning)"
+    )
+    parser.add_argument("--model", help="OCR model to load (default: active model)")
+    parser.add_argument(
+        "--plates-db",
+        default=DEFAULT_PLATES_DB,
+        help="SQLite database of authorized plates, shared with the GUI",
+    )
+    parser.add_argument(
+        "--plate",
+        action="append",
+        default=[],
+        help="Authorized plate, replacing the database (repeatable)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stream = commands.add_parser("run-stream", help="Recognize a live stream")
+    stream.add_argument("source", help="Camera index, stream URL or video file")
+    stream.add_argument("--queue-size", type=int, default=1)
+    stream.add_argument("--drop-policy", default="latest", choices=("latest", "block"))
+    stream.add_argument("--motion-gate", action="store_true", help="Gate on motion")
+    stream.add_argument("--vote", action="store_true", help="Vote across frames")
+    stream.add_argument("--track", action="store_true", help="Track the plate")
+    stream.add_argument("--cache", action="store_true", help="Cache OCR results")
+    stream.add_argument(
+        "--metrics-port", type=int, help="Serve Prometheus metrics on this port"
+    )
+    stream.set_defaults(handler=run_stream)
+
+    directory = commands.add_parser(
+        "process-dir", help="Recognize every image in a directory"
+    )
+    directory.add_argument("directory", help="Directory of car images")
+    directory.add_argument(
+        "--workers", type=int, help="Worker processes (default: all CPUs)"
+    )
+    directory.add_argument("--output", help="Write JSON lines here instead of stdout")
+    directory.set_defaults(handler=process_dir)
+
+    service = commands.add_parser("serve", help="Recognize images posted over HTTP")
+    service.add_argument("--host", default="127.0.0.1")
+    service.add_argument("--port", type=int, default=8080)
+    service.add_argument(
+        "--workers", type=int, help="Recognition threads (default: twice the CPUs)"
+    )
+    service.add_argument(
+        "--max-pending",
+        type=int,
+        default=64,
+        help="Requests queued before answering 503 (default 64)",
+    )
+    service.add_argument(
+        "--max-batch",
+        type=int,
+        default=256,
+        help="Character crops classified per call (default 256)",
+    )
+    service.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=5.0,
+        help="Longest wait for a batch to fill (default 5 ms)",
+    )
+    service.set_defaults(handler=serve)
+
+    args = parser.parse_args(argv)
+
+    args.import_timer = ImportTimer().install() if args.import_times else None
+    try:
+        return args.handler(args)
+    finally:
+        # Commands that never produced output still report their imports
+        if args.import_timer is not None:
+            args.import_timer.uninstall()
+            args.import_timer.report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
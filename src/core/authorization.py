@@ -0,0 +1,301 @@
+"""
+Authorization Stores
+Backends holding the authorized plates. Plates are indexed by a canonical
+key, so lookups do not depend on spacing or digit script. Every store
+reports additions and removals to its listeners, including changes made
+by other processes sharing an SQLite database.
+"""
+
+import sqlite3
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+ADDED = "added"
+REMOVED = "removed"
+
+Change = Tuple[str, str]
+
+# Resolved from the package, so every entry point shares one database
+DEFAULT_PLATES_DB = (
+    Path(__file__).resolve().parents[2] / "data" / "authorized_plates.db"
+)
+
+
+# Arabic tatweel, only stretches the letters around it
+_TATWEEL = "\u0640"
+
+
+def canonical_plate_key(plate: str) -> str:
+    """Canonical form of a plate: NFKC, ASCII digits, no whitespace or tatweel"""
+    plate = unicodedata.normalize("NFKC", plate)
+    return "".join(
+        (
+            str(unicodedata.decimal(char))
+            if unicodedata.decimal(char, None) is not None
+            else char
+        )
+        for char in plate
+        if not char.isspace() and char != _TATWEEL
+    )
+
+
+class AuthorizationStore(ABC):
+    """Interface shared by the authorization backends"""
+
+    def __init__(self):
+        self._listeners: List[Callable[[List[Change]], None]] = []
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def __contains__(self, plate: str) -> bool:
+        return self.contains(plate)
+
+    @abstractmethod
+    def contains(self, plate: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, plate: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove(self, plate: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def import_plates(self, plates: Iterable[str]) -> int:
+        """Add many plates at once, returning how many were new"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def poll_changes(self) -> List[Change]:
+        """Return (and notify listeners of) changes since the last poll"""
+        return []
+
+    def export_plates(self) -> List[str]:
+        return sorted(self, key=canonical_plate_key)
+
+    def import_file(self, path) -> int:
+        """Import a UTF-8 text file with one plate per line"""
+        with open(path, encoding="utf-8") as file:
+            return self.import_plates(line.strip() for line in file if line.strip())
+
+    def export_file(self, path) -> int:
+        plates = self.export_plates()
+        with open(path, "w", encoding="utf-8") as file:
+            file.writelines(f"{plate}\n" for plate in plates)
+        return len(plates)
+
+    def add_listener(self, listener: Callable[[List[Change]], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[Change]], None]) -> None:
+        self._listeners.remove(listener)
+
+    def start_watching(self, interval: float = 1.0) -> None:
+        """Poll for changes from other processes on a background thread"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                self.poll_changes()
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=watch, name="authorization-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _notify(self, changes: List[Change]) -> None:
+        if changes:
+            for listener in list(self._listeners):
+                listener(changes)
+
+
+class MemoryAuthorizationStore(AuthorizationStore):
+    """In-process store, lost on restart"""
+
+    def __init__(self, plates: Iterable[str] = ()):
+        super().__init__()
+        self._plates = {}
+        for plate in plates:
+            self._plates.setdefault(canonical_plate_key(plate), plate)
+
+    def contains(self, plate: str) -> bool:
+        return canonical_plate_key(plate) in self._plates
+
+    def add(self, plate: str) -> bool:
+        return self.import_plates([plate]) == 1
+
+    def remove(self, plate: str) -> bool:
+        removed = self._plates.pop(canonical_plate_key(plate), None)
+        if removed is None:
+            return False
+        self._notify([(REMOVED, removed)])
+        return True
+
+    def import_plates(self, plates: Iterable[str]) -> int:
+        changes = []
+        for plate in plates:
+            key = canonical_plate_key(plate)
+            if key not in self._plates:
+                self._plates[key] = plate
+                changes.append((ADDED, plate))
+        self._notify(changes)
+        return len(changes)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._plates.values()))
+
+    def __len__(self) -> int:
+        return len(self._plates)
+
+
+class SQLiteAuthorizationStore(AuthorizationStore):
+    """
+    Persistent store in an SQLite database in WAL mode
+
+    Lookups go through the primary key index, so they are O(log n) and
+    always see edits committed by other processes. Triggers append every
+    insert and delete to a change log, which poll_changes reads
+    incrementally to notify listeners. The log is trimmed to its newest
+    change_log_size entries on opening and as polls move past them.
+    """
+
+    change_log_size = 10000
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        # Only changes made after opening are reported
+        self._last_change = self._connection.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM changes"
+        ).fetchone()[0]
+        self.prune_changes()
+
+    def _create_schema(self):
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS plates (
+                key TEXT PRIMARY KEY,
+                plate TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                action TEXT NOT NULL,
+                plate TEXT NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS plates_added AFTER INSERT ON plates
+            BEGIN
+                INSERT INTO changes (action, plate) VALUES ('added', NEW.plate);
+            END;
+            CREATE TRIGGER IF NOT EXISTS plates_removed AFTER DELETE ON plates
+            BEGIN
+                INSERT INTO changes (action, plate) VALUES ('removed', OLD.plate);
+            END;
+            """)
+
+    def close(self) -> None:
+        self.stop_watching()
+        with self._lock:
+            self._connection.close()
+
+    def contains(self, plate: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM plates WHERE key = ?", (canonical_plate_key(plate),)
+            ).fetchone()
+        return row is not None
+
+    def add(self, plate: str) -> bool:
+        return self.import_plates([plate]) == 1
+
+    def remove(self, plate: str) -> bool:
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM plates WHERE key = ?", (canonical_plate_key(plate),)
+            )
+        self.poll_changes()
+        return cursor.rowcount > 0
+
+    def import_plates(self, plates: Iterable[str]) -> int:
+        rows = ((canonical_plate_key(plate), plate) for plate in plates)
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                cursor = self._connection.executemany(
+                    "INSERT OR IGNORE INTO plates (key, plate) VALUES (?, ?)", rows
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        self.poll_changes()
+        return cursor.rowcount
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT plate FROM plates ORDER BY key"
+            ).fetchall()
+        return iter([plate for (plate,) in rows])
+
+    def export_plates(self) -> List[str]:
+        return list(self)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM plates").fetchone()[0]
+
+    def poll_changes(self) -> List[Change]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT seq, action, plate FROM changes WHERE seq > ? ORDER BY seq",
+                (self._last_change,),
+            ).fetchall()
+            if rows:
+                self._last_change = rows[-1][0]
+            prune = self._last_change - self._pruned_at >= self.change_log_size
+
+        if prune:
+            self.prune_changes()
+        changes = [(action, plate) for _, action, plate in rows]
+        self._notify(changes)
+        return changes
+
+    def prune_changes(self, keep: Optional[int] = None) -> None:
+        """Drop all but the newest keep entries of the change log"""
+        if keep is None:
+            keep = self.change_log_size
+        with self._lock:
+            self._pruned_at = self._last_change
+            self._connection.execute(
+                "DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+                (keep,),
+            )
@@ -1,8 +1,8 @@
 import cv2 as cv
-import imutils
 import numpy as np
-from skimage import measure
 
+from core.tracing import annotate, span
+from utils.component_analysis import analyze_components
 from utils.contours_utils import *
 
 
@@ -13,6 +13,10 @@ class CharExtractor:
         self.annotated_image = None
 
     def extract_chars(self, img):
+        with span("extract_chars"):
+            return self._extract_chars(img)
+
+    def _extract_chars(self, img):
         self.filtered_contours = []
         self.extracted_characters = []
         self.annotated_image = None
@@ -27,8 +31,9 @@ class CharExtractor:
         self.img[0] = self.preprocess_image(self.img[0])
 
         # Find contours and filter them
-        labels = measure.label(self.img[0], background=0)
-        self.filtered_contours = self.find_and_filter_contours(labels)
+        _, stats = analyze_components(self.img[0])
+        self.filtered_contours = self.find_and_filter_contours(stats)
+        annotate(components=len(stats), contours=len(self.filtered_contours))
 
         # Merge and cluster contours
         self.filtered_contours = self.merge_and_cluster_contours()
@@ -38,6 +43,11 @@ class CharExtractor:
 
         # Determine is_valid_plate based on the number of car letters
         is_valid_plate = self.determine_is_valid_plate()
+        annotate(
+            merged_contours=len(self.filtered_contours),
+            characters=len(self.extracted_characters),
+            valid=bool(is_valid_plate),
+        )
 
         return [self.img[1], is_valid_plate, self.extracted_characters]
 
@@ -45,51 +55,36 @@ class CharExtractor:
         dilation_kernel = cv.getStructuringElement(cv.MORPH_RECT, (1, 3))
         return cv.dilate(image, dilation_kernel, iterations=1)
 
-    def find_and_filter_contours(self, labels):
-        for idx, label in enumerate(np.unique(labels)):
-            if label == 0:
-                continue
-
-            current_label_mask = np.zeros(self.img[0].shape, dtype="uint8")
-            current_label_mask[labels == label] = 255
-
-            label_contours = cv.findContours(
-                current_label_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE
-            )
-            label_contours = (
-                label_contours[1] if imutils.is_cv3() else label_contours[0]
+    def find_and_filter_contours(self, stats):
+        for contour_x, contour_y, contour_width, contour_height in zip(
+            stats.x, stats.y, stats.width, stats.height
+        ):
+            cv.rectangle(
+                self.annotated_image,
+                (int(contour_x), int(contour_y)),
+                (int(contour_x + contour_width), int(contour_y + contour_height)),
+                (0, 255, 0),
+                1,
             )
 
-            if len(label_contours) > 0:
-                c = max(label_contours, key=cv.contourArea)
-                if self.is_valid_contour(c):
-                    self.filtered_contours.append(c)
+        valid_indices = np.flatnonzero(self.is_valid_component(stats))
+        self.filtered_contours = [stats.contours[i] for i in valid_indices]
 
         return self.filtered_contours
 
-    def is_valid_contour(self, c):
-        (contour_x, contour_y, contour_width, contour_height) = cv.boundingRect(c)
-        aspect_ratio = contour_width / float(contour_height)
-        contour_solidity = cv.contourArea(c) / float(contour_width * contour_height)
-        area = cv.contourArea(c)
+    def is_valid_component(self, stats):
+        contour_solidity = stats.solidity
+        area = stats.area
 
-        is_valid_area = area > 70 and area < 1100
+        is_valid_area = (area > 70) & (area < 1100)
         center_line = self.img[1].shape[0] // 2
 
-        cv.rectangle(
-            self.annotated_image,
-            (contour_x, contour_y),
-            (contour_x + contour_width, contour_y + contour_height),
-            (0, 255, 0),
-            1,
-        )
-
         return (
             is_valid_area
-            and contour_solidity < 0.8
-            and (
-                (center_line > contour_y and center_line < contour_y + contour_height)
-                or (center_line <= contour_y)
+            & (contour_solidity < 0.8)
+            & (
+                ((center_line > stats.y) & (center_line < stats.y + stats.height))
+                | (center_line <= stats.y)
             )
         )
 
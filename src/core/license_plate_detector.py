@@ -1,30 +1,49 @@
 import cv2 as cv
-import imutils
 import numpy as np
 
+from core.tracing import annotate, span
 from utils.contours_utils import *
+from utils.image_utils import resize_to_width
 
 
 class LicensePlateDetector:
-    def __init__(self):
-        """Initialize the License Plate Detector"""
-        pass
+    def __init__(self, tracking=False, roi_margin=(100, 50), redetect_interval=30):
+        """
+        Initialize the License Plate Detector
+
+        With tracking enabled (for consecutive video frames), once a plate
+        is found the following frames only search a window around the last
+        plate box, expanded by roi_margin (x, y) pixels. A full-frame search
+        runs again whenever the plate is lost and every redetect_interval
+        frames.
+        """
+        self.tracking = tracking
+        self.roi_margin = roi_margin
+        self.redetect_interval = redetect_interval
+        self.reset_tracking()
+
+    def reset_tracking(self):
+        """Forget the tracked plate so the next frame is searched in full"""
+        self.track_box = None
+        self.track_ratio = None
+        self.frames_since_full_search = 0
 
     def preprocess_image(self, img):
         """Resize and crop the image"""
-        image_shape = img.shape
-        img = imutils.resize(
-            img, width=1000, height=1000 * image_shape[0] // image_shape[1]
-        )
+        img = self.resize_and_crop(img)
+        return img, self.to_gray(img)
 
-        gray = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
-        gray = gray[
-            gray.shape[0] * 2 // 5 : gray.shape[0] - 60, :
-        ]  # crop the image, (- 60) to remove camera watermark
-        gray = cv.GaussianBlur(gray, (3, 3), 0)
+    def resize_and_crop(self, img):
+        """Resize to 1000 px wide and keep the lower part of the frame"""
+        img = resize_to_width(img, 1000)
+
+        # crop the image, (- 60) to remove camera watermark
+        return img[img.shape[0] * 2 // 5 : img.shape[0] - 60, :]
 
-        img = img[img.shape[0] * 2 // 5 : img.shape[0] - 60, :]
-        return img, gray
+    def to_gray(self, img):
+        """Grayscale and blur a region of the cropped image"""
+        gray = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
+        return cv.GaussianBlur(gray, (3, 3), 0)
 
     def apply_black_hat_morphology(self, gray):
         """Apply black hat morphological operation"""
@@ -92,6 +111,16 @@ class LicensePlateDetector:
 
     def find_and_process_contours(self, final_img, img):
         """Find and process contours to extract the desired region"""
+        return self.crop_plate(img, self.locate_plate(final_img))
+
+    def locate_plate(self, final_img):
+        """Find the plate bounding box (x, y, w, h) in the refined mask"""
+        with span("locate_plate"):
+            box = self._locate_plate(final_img)
+            annotate(found=box is not None)
+        return box
+
+    def _locate_plate(self, final_img):
         # Find contours
         contours, _ = cv.findContours(
             final_img.copy(), cv.RETR_EXTERNAL, cv.CHAIN_APPROX_NONE
@@ -99,9 +128,10 @@ class LicensePlateDetector:
 
         # Merge close contours
         merged_contours = agglomerative_cluster(list(contours), "x")
+        annotate(contours=len(contours), merged_contours=len(merged_contours))
         sorted_contours = sorted(merged_contours, key=cv.contourArea, reverse=True)
 
-        # Process and crop contours
+        # Process contours
         for cnt in sorted_contours:
             area = cv.contourArea(cnt)
             _, _, w1, h1 = cv.boundingRect(cnt)
@@ -117,17 +147,24 @@ class LicensePlateDetector:
                 aspect_ratio = w / float(h)
 
                 if 1.5 <= aspect_ratio <= 6:
-                    if y == 0:
-                        return img[y : y + h + 5, x : x + w]
-                    else:
-                        return img[y - 6 : y + h + 5, x : x + w]
+                    return x, y, w, h
 
-        return np.zeros_like(img)
+        return None
 
-    def detect(self, img):
-        """License Plate Detection main method"""
-        # Preprocessing
-        img, gray = self.preprocess_image(img)
+    def crop_plate(self, img, box):
+        """Crop the plate region, or return a blank image when not found"""
+        if box is None:
+            return np.zeros_like(img)
+
+        x, y, w, h = box
+        if y == 0:
+            return img[y : y + h + 5, x : x + w]
+        else:
+            return img[y - 6 : y + h + 5, x : x + w]
+
+    def search_full_frame(self, img):
+        """Run the whole detection chain over the cropped frame"""
+        gray = self.to_gray(img)
 
         # Black hat morphology
         black_hat_image = self.apply_black_hat_morphology(gray)
@@ -141,5 +178,67 @@ class LicensePlateDetector:
         # Image refinement
         final_img = self.refine_image(closed_image, ratio)
 
-        # Contour processing and cropping
-        return self.find_and_process_contours(final_img, img)
+        # Contour processing
+        box = self.locate_plate(final_img)
+
+        if self.tracking:
+            self.track_box = box
+            self.track_ratio = ratio
+            self.frames_since_full_search = 0
+
+        return self.crop_plate(img, box)
+
+    def search_tracked_window(self, img):
+        """
+        Run the detection chain only around the tracked plate
+
+        The pixel ratio that selects the morphology branches is kept from
+        the last full-frame search, since a window's own ratio is not
+        comparable. Returns None when the plate is not found in the window.
+        """
+        x, y, w, h = self.track_box
+        margin_x, margin_y = self.roi_margin
+        x0, y0 = max(x - margin_x, 0), max(y - margin_y, 0)
+        x1 = min(x + w + margin_x, img.shape[1])
+        y1 = min(y + h + margin_y, img.shape[0])
+
+        gray = self.to_gray(img[y0:y1, x0:x1])
+        black_hat_image = self.apply_black_hat_morphology(gray)
+        thresholded_image, _ = self.threshold_and_analyze_image(black_hat_image)
+        closed_image = self.process_sobel_gradient(thresholded_image, self.track_ratio)
+        final_img = self.refine_image(closed_image, self.track_ratio)
+
+        box = self.locate_plate(final_img)
+        if box is None:
+            return None
+
+        box_x, box_y, box_w, box_h = box
+        self.track_box = (box_x + x0, box_y + y0, box_w, box_h)
+        return self.crop_plate(img, self.track_box)
+
+    def detect(self, img):
+        """License Plate Detection main method"""
+        with span("detect"):
+            return self._detect(img)
+
+    def _detect(self, img):
+        # Preprocessing
+        img = self.resize_and_crop(img)
+
+        # Search around the tracked plate first, when there is one
+        if (
+            self.tracking
+            and self.track_box is not None
+            and self.frames_since_full_search < self.redetect_interval
+        ):
+            self.frames_since_full_search += 1
+            with span("search_tracked_window"):
+                plate = self.search_tracked_window(img)
+            if plate is not None:
+                return plate
+
+            # Track lost, fall back to the whole frame
+            self.reset_tracking()
+
+        with span("search_full_frame"):
+            return self.search_full_frame(img)
@@ -0,0 +1,199 @@
+"""
+Pipeline Metrics
+Per-stage latency histograms and outcome counters for the recognition
+pipeline, readable through snapshot() or served as Prometheus text over a
+local HTTP endpoint.
+"""
+
+import bisect
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Bucket upper bounds in seconds, 50 us to ~13 s in steps of sqrt(2)
+DEFAULT_BUCKETS = tuple(50e-6 * 2 ** (i / 2) for i in range(37))
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of durations
+
+    Recording is a binary search and an increment, so the cost does not
+    grow with the number of samples. Percentiles are interpolated within
+    a bucket, which bounds their error by the bucket width.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimated q-th percentile (0-100), or None when empty"""
+        if self.count == 0:
+            return None
+
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                # Overflow samples are reported at the last bound
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class PipelineMetrics:
+    """Thread-safe registry shared by the controller and streaming stages"""
+
+    # Prometheus label name of each counter's label, reason by default
+    COUNTER_LABELS = {"frames_dropped": "stage"}
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, namespace: str = "cerberus"):
+        self.buckets = tuple(buckets)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._server = None
+
+    def time(self, stage: str) -> _StageTimer:
+        """Context manager recording the duration of a stage"""
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, counter: str, label: str, amount: int = 1) -> None:
+        """Add to a counter such as ("results", "no_plate")"""
+        with self._lock:
+            key = (counter, label)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """Percentiles per stage (in seconds) and counter values"""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "p50": histogram.percentile(50),
+                    "p95": histogram.percentile(95),
+                    "p99": histogram.percentile(99),
+                }
+                for stage, histogram in self._histograms.items()
+            }
+            counters = {}
+            for (counter, label), value in self._counters.items():
+                counters.setdefault(counter, {})[label] = value
+        return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines: List[str] = [
+            f"# HELP {name} Time spent in each pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{name}_bucket{{stage="{stage}",le="{bound:.6g}"}} '
+                        f"{cumulative}"
+                    )
+                lines.append(
+                    f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}'
+                )
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum!r}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+            counter_names = sorted({counter for counter, _ in self._counters})
+            for counter in counter_names:
+                metric = f"{self.namespace}_{counter}_total"
+                label_name = self.COUNTER_LABELS.get(counter, "reason")
+                lines.append(f"# TYPE {metric} counter")
+                for (other, label), value in sorted(self._counters.items()):
+                    if other == counter:
+                        lines.append(f'{metric}{{{label_name}="{label}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9100, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+        """Serve /metrics on a background thread; port 0 picks a free port"""
+        # Imported here, http.server alone takes ~40 ms to import
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        if self._server is not None:
+            return self._server
+
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        ).start()
+        return self._server
+
+    def stop_serving(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,101 @@
+"""
+Motion Gate
+Cheap trigger in front of the recognition pipeline. Frames are compared
+against a running background model at low resolution, and full processing
+only runs while something moves inside the configured region.
+"""
+
+import cv2 as cv
+import numpy as np
+
+
+class MotionGate:
+    def __init__(
+        self,
+        region=(0.0, 0.4, 1.0, 1.0),
+        width=160,
+        learning_rate=0.05,
+        pixel_threshold=25,
+        trigger_ratio=0.02,
+        release_ratio=0.01,
+        trigger_frames=2,
+        cooldown_frames=15,
+    ):
+        """
+        Initialize the Motion Gate
+
+        region is (left, top, right, bottom) as fractions of the frame; the
+        default covers the lower 3/5 searched by the plate detector. A pixel
+        moves when it differs from the background by more than
+        pixel_threshold. The gate opens after trigger_frames consecutive
+        frames with at least trigger_ratio of the region moving, and closes
+        once less than release_ratio moves for cooldown_frames frames.
+        """
+        if release_ratio > trigger_ratio:
+            raise ValueError("release_ratio must not exceed trigger_ratio")
+
+        self.region = region
+        self.width = width
+        self.learning_rate = learning_rate
+        self.pixel_threshold = pixel_threshold
+        self.trigger_ratio = trigger_ratio
+        self.release_ratio = release_ratio
+        self.trigger_frames = trigger_frames
+        self.cooldown_frames = cooldown_frames
+        self.reset()
+
+    def reset(self):
+        """Drop the background model and close the gate"""
+        self.background = None
+        self.active = False
+        self.motion_ratio = 0.0
+        self._trigger_count = 0
+        self._cooldown_left = 0
+
+    def _downsample(self, frame):
+        """Crop the region, shrink it and convert it to blurred grayscale"""
+        frame_height, frame_width = frame.shape[:2]
+        left, top, right, bottom = self.region
+        region = frame[
+            int(top * frame_height) : int(bottom * frame_height),
+            int(left * frame_width) : int(right * frame_width),
+        ]
+
+        height = max(1, region.shape[0] * self.width // max(region.shape[1], 1))
+        small = cv.resize(region, (self.width, height), interpolation=cv.INTER_AREA)
+        if small.ndim == 3:
+            small = cv.cvtColor(small, cv.COLOR_BGR2GRAY)
+        return cv.GaussianBlur(small, (5, 5), 0)
+
+    def update(self, frame):
+        """Feed the next frame and return whether it should be processed"""
+        small = self._downsample(frame)
+
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            return self.active
+
+        difference = cv.absdiff(small, cv.convertScaleAbs(self.background))
+        self.motion_ratio = np.count_nonzero(difference > self.pixel_threshold) / float(
+            difference.size
+        )
+        cv.accumulateWeighted(small, self.background, self.learning_rate)
+
+        if not self.active:
+            if self.motion_ratio >= self.trigger_ratio:
+                self._trigger_count += 1
+            else:
+                self._trigger_count = 0
+
+            if self._trigger_count >= self.trigger_frames:
+                self.active = True
+                self._trigger_count = 0
+                self._cooldown_left = self.cooldown_frames
+        elif self.motion_ratio >= self.release_ratio:
+            self._cooldown_left = self.cooldown_frames
+        else:
+            self._cooldown_left -= 1
+            if self._cooldown_left <= 0:
+                self.active = False
+
+        return self.active
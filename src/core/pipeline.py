@@ -1,18 +1,33 @@
 import logging
-from dataclasses import dataclass
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Union
 
 import cv2
 import numpy as np
-import pandas as pd
-from joblib import load
-from skimage.feature import hog
 
+from core.authorization import AuthorizationStore, MemoryAuthorizationStore
 from core.character_extractor import CharExtractor
 from core.license_plate_detector import LicensePlateDetector
+from core.metrics import PipelineMetrics
+from core.plate_matching import FuzzyPlateIndex
 from core.plate_enhancer import LicensePlateEnhancer
+from core.result_cache import PlateResultCache
+from core.tracing import FrameTracer, span
+from ml.linear_svc import LinearOvOClassifier
+from ml.registry import ModelRegistry, validate_model
 from utils.arabic_plate_translator import ArabicPlateTranslator
+from utils.hog_features import batch_hog, prepare_char_batch
+
+# Resolved from the package, so the model is found from any working directory
+DEFAULT_MODEL_PATH = (
+    Path(__file__).resolve().parents[2] / "data" / "models" / "model_svm.npz"
+)
 
 
 @dataclass
@@ -23,24 +38,82 @@ class PlateRecognitionResult:
     characters: List[str]
     arabic_characters: Optional[List[str]] = None
     error_message: Optional[str] = None
+    char_positions: Optional[List[int]] = None
+    # Reused from a near-duplicate crop rather than read from this frame
+    cached: bool = False
+
+    @property
+    def plate_text(self) -> Optional[str]:
+        """Arabic plate as checked against the authorized plates"""
+        if not self.success or not self.arabic_characters:
+            return None
+        return " ".join(self.arabic_characters)
+
+    def to_dict(self) -> dict:
+        """JSON-serializable summary, without the images"""
+        return {
+            "success": self.success,
+            "plate": self.plate_text,
+            "characters": [str(character) for character in self.characters],
+            "error": self.error_message,
+        }
 
 
 class GateAccessController:
 
     def __init__(
         self,
-        model_path: str = "./data/models/model_svm.pkl",
+        model_path: Optional[str] = None,
         authorized_plates: List[str] = [],
         translation_map: dict = {},
+        track_plates: bool = False,
+        result_cache: Optional[PlateResultCache] = None,
+        authorization_store: Optional[AuthorizationStore] = None,
+        metrics: Optional[PipelineMetrics] = None,
+        tracer: Optional[FrameTracer] = None,
+        model_registry: Optional[ModelRegistry] = None,
+        model: Optional[object] = None,
     ):
         self.logger = self._setup_logger()
+        # Without a path, load the registry's active model or the default one
+        self.model_registry = model_registry
+        if model_path is None:
+            model_path = (
+                DEFAULT_MODEL_PATH
+                if model_registry is None
+                else model_registry.active_path
+            )
         self.model_path = Path(model_path)
-        self.detector = LicensePlateDetector()
+        # Tracking only makes sense for consecutive frames of one camera
+        self.detector = LicensePlateDetector(tracking=track_plates)
         self.enhancer = LicensePlateEnhancer()
         self.extractor = CharExtractor()
         self.translator = ArabicPlateTranslator(translation_map)
-        self.model = self._load_model()
-        self.authorized_plates = set(authorized_plates)
+        # A preloaded model, such as one attached from shared memory, is used as is
+        self.model = self._load_model(self.model_path) if model is None else model
+        self.model_version = (
+            model_registry.active_version() if model_registry is not None else None
+        )
+        # Models replaced by hot-swaps, newest last, for rollback
+        self._previous_models = deque(maxlen=3)
+        self._model_lock = threading.Lock()
+        self._model_loader = None
+        self._model_watcher = None
+        self._stop_model_watch = threading.Event()
+        # Plates given directly are only kept for this process
+        # An empty store is falsy, so test for None to keep an empty database
+        self.authorized_plates = (
+            authorization_store
+            if authorization_store is not None
+            else MemoryAuthorizationStore(authorized_plates)
+        )
+        self.result_cache = result_cache
+        # Stage timings and outcome counters are only recorded when given
+        self.metrics = metrics
+        # Sampled frames record nested spans for Chrome trace export
+        self.tracer = tracer
+        # Built on the first approximate lookup, then kept in sync with the store
+        self._fuzzy_index = None
 
         # HOG parameters
         self.hog_params = {
@@ -56,19 +129,27 @@ class GateAccessController:
         logger = logging.getLogger("GateAccessControl")
         logger.setLevel(logging.INFO)
 
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        # Controllers share the logger, so only the first one adds a handler
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
 
         return logger
 
-    def _load_model(self) -> object:
+    def _load_model(self, model_path: Path) -> object:
         try:
-            self.logger.info(f"Loading model from {self.model_path}")
-            return load(self.model_path, mmap_mode="r")
+            self.logger.info(f"Loading model from {model_path}")
+            if model_path.suffix == ".npz":
+                return LinearOvOClassifier.load(model_path)
+
+            # Pickled scikit-learn models still load, at the cost of importing it
+            from joblib import load
+
+            return load(model_path, mmap_mode="r")
         except FileNotFoundError as e:
             self.logger.error(f"Model file not found: {e}")
             raise
@@ -76,18 +157,130 @@ class GateAccessController:
             self.logger.error(f"Error loading model: {e}")
             raise
 
+    def _feature_length(self) -> int:
+        cell_width, cell_height = self.hog_params["pixels_per_cell"]
+        char_width, char_height = self.char_dims
+        cells = (char_width // cell_width) * (char_height // cell_height)
+        return cells * self.hog_params["orientations"]
+
+    def load_model_async(
+        self,
+        source: Union[int, str, Path, None] = None,
+        warmup=None,
+        min_accuracy: float = 0.9,
+    ) -> Future:
+        """
+        Load, validate and swap in a model while recognition keeps running
+
+        source is a registry version, a model path, or None for the
+        registry's active version. The model is validated on the warm-up
+        (features, labels) set, which defaults to the one stored with a
+        registry version, and only then replaces the current model. Frames
+        in flight finish on the model they started with. The returned
+        future raises ModelValidationError when the model is rejected.
+        """
+        if self._model_loader is None:
+            self._model_loader = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="model-loader"
+            )
+        return self._model_loader.submit(self._swap_model, source, warmup, min_accuracy)
+
+    def _swap_model(self, source, warmup, min_accuracy):
+        version = None
+        if source is None or isinstance(source, int):
+            if self.model_registry is None:
+                raise ValueError("Loading a model version needs a model registry")
+            version = self.model_registry.active_version() if source is None else source
+            path = (
+                self.model_registry.active_path
+                if source is None
+                else self.model_registry.path(version)
+            )
+            if warmup is None and version is not None:
+                warmup = self.model_registry.warmup_set(version)
+        else:
+            path = Path(source)
+
+        model = self._load_model(path)
+        features, labels = warmup if warmup is not None else (None, None)
+        accuracy = validate_model(
+            model, self._feature_length(), features, labels, min_accuracy
+        )
+
+        with self._model_lock:
+            self._previous_models.append(
+                (self.model, self.model_path, self.model_version)
+            )
+            # Each frame reads self.model once, so it never mixes two models
+            self.model, self.model_path, self.model_version = model, path, version
+
+        accuracy_text = "" if accuracy is None else f", warm-up accuracy {accuracy:.3f}"
+        self.logger.info(f"Swapped in model {path}{accuracy_text}")
+        return version
+
+    def rollback_model(self) -> bool:
+        """Return to the model used before the last swap"""
+        with self._model_lock:
+            if not self._previous_models:
+                return False
+            self.model, self.model_path, self.model_version = (
+                self._previous_models.pop()
+            )
+        self.logger.info(f"Rolled back to model {self.model_path}")
+        return True
+
+    def start_model_watch(self, interval: float = 5.0) -> None:
+        """Hot-swap the registry's active version whenever it changes"""
+        if self.model_registry is None:
+            raise ValueError("Watching for models needs a model registry")
+        if self._model_watcher is not None:
+            return
+
+        def watch():
+            seen_version = self.model_registry.active_version()
+            while not self._stop_model_watch.wait(interval):
+                version = self.model_registry.active_version()
+                if version is None or version == seen_version:
+                    continue
+                seen_version = version
+                try:
+                    self.load_model_async(version).result()
+                except Exception as e:
+                    self.logger.error(f"Rejected model version {version}: {e}")
+
+        self._stop_model_watch.clear()
+        self._model_watcher = threading.Thread(
+            target=watch, name="model-watcher", daemon=True
+        )
+        self._model_watcher.start()
+
+    def stop_model_watch(self) -> None:
+        if self._model_watcher is not None:
+            self._stop_model_watch.set()
+            self._model_watcher.join()
+            self._model_watcher = None
+
+    def _time(self, stage: str):
+        return nullcontext() if self.metrics is None else self.metrics.time(stage)
+
+    def _count_result(self, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.increment("results", reason)
+
     def _extract_hog_features(self, char_image: np.ndarray) -> np.ndarray:
-        try:
-            resized = cv2.resize(char_image, self.char_dims)
+        return self._extract_hog_features_batch([char_image])[0]
 
-            if len(resized.shape) == 3:
-                gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = resized
+    def _extract_hog_features_batch(self, char_images: List[np.ndarray]) -> np.ndarray:
+        try:
+            gray = prepare_char_batch(char_images, self.char_dims)
 
-            features = hog(gray, **self.hog_params)
+            features = batch_hog(
+                gray,
+                orientations=self.hog_params["orientations"],
+                pixels_per_cell=self.hog_params["pixels_per_cell"],
+            )
 
-            return features.flatten()
+            return np.ascontiguousarray(features, dtype=np.float32)
 
         except Exception as e:
             self.logger.error(f"Error extracting HOG features: {e}")
@@ -97,70 +290,252 @@ class GateAccessController:
         try:
             self.logger.info("Starting image processing")
 
-            car_image = np.array(image)
+            frame_scope = nullcontext() if self.tracer is None else self.tracer.frame()
+            with frame_scope, self._time("total"):
+                car_image = np.array(image)
 
-            plate = self.detector.detect(car_image)
-            if plate is None:
-                return PlateRecognitionResult(
-                    plate_image=car_image,
-                    characters=[],
-                    success=False,
-                    error_message="No license plate detected",
-                )
+                plate = self.detect_plate(car_image)
 
-            enhanced_plate = self.enhancer.enhance_plate(plate)
+                return self.recognize_plate(plate, car_image)
 
-            car_plate, success_flag, char_regions = self.extractor.extract_chars(
-                enhanced_plate
+        except Exception as e:
+            self.logger.error(f"Error processing image: {e}")
+            self._count_result("error")
+            return PlateRecognitionResult(
+                plate_image=image,
+                characters=[],
+                success=False,
+                error_message=str(e),
             )
 
-            if not success_flag:
-                return PlateRecognitionResult(
-                    plate_image=car_plate,
-                    characters=[],
-                    success=False,
-                    error_message="Character extraction failed",
-                )
+    def detect_plate(self, car_image: np.ndarray) -> Optional[np.ndarray]:
+        """Detection stage: locate and crop the plate in a car image"""
+        with self._time("detection"):
+            return self.detector.detect(car_image)
+
+    def recognize_plate(
+        self, plate: Optional[np.ndarray], car_image: np.ndarray
+    ) -> PlateRecognitionResult:
+        """Recognition stage: enhance, segment and classify a plate crop"""
+        if plate is None:
+            self._count_result("no_plate")
+            return PlateRecognitionResult(
+                plate_image=car_image,
+                characters=[],
+                success=False,
+                error_message="No license plate detected",
+            )
+
+        with self._time("normalization"), span("normalize_plate"):
+            normalized_plate = self.enhancer.normalize_plate(plate)
+
+        # The detector returns a blank crop when it finds nothing
+        if normalized_plate is None:
+            self._count_result("no_plate")
+            return PlateRecognitionResult(
+                plate_image=car_image,
+                characters=[],
+                success=False,
+                error_message="No license plate detected",
+            )
 
-            char_features = []
-            char_regions = sorted(char_regions, key=lambda x: x[1])
+        # A near-duplicate of a recent crop reuses that crop's result
+        fingerprint = None
+        if self.result_cache is not None:
+            fingerprint = self.result_cache.fingerprint(normalized_plate[0])
+            cached_result = self.result_cache.get(
+                fingerprint, normalized_plate[0].shape
+            )
+            if cached_result is not None:
+                self.logger.info("Reused cached result for a near-duplicate plate")
+                self._count_result("cached")
+                return replace(cached_result, cached=True)
 
-            for char_img, _ in char_regions:
-                features = self._extract_hog_features(char_img)
-                char_features.append(features)
+        result = self._classify_plate(normalized_plate)
 
-            df_features = pd.DataFrame(char_features)
-            df_features = df_features.dropna(axis=1)
+        # Failures are not cached, so the next frame of the car is read again
+        if fingerprint is not None and result.success and result.characters:
+            self.result_cache.put(fingerprint, normalized_plate[0].shape, result)
 
-            predicted_chars = self.model.predict(df_features)
+        return result
 
-            arabic_chars = self.translator.translate_to_arabic(predicted_chars)
+    def _classify_plate(self, normalized_plate) -> PlateRecognitionResult:
+        with self._time("enhancement"):
+            enhanced_plate = self.enhancer.enhance_normalized_plate(*normalized_plate)
 
-            self.logger.info(
-                f"Successfully processed image. Found {len(predicted_chars)} characters"
+        with self._time("segmentation"):
+            car_plate, success_flag, char_regions = self.extractor.extract_chars(
+                enhanced_plate
             )
 
+        if not success_flag:
+            self._count_result("extraction_failed")
             return PlateRecognitionResult(
                 plate_image=car_plate,
-                characters=list(predicted_chars),
-                arabic_characters=arabic_chars,
-                success=True,
-            )
-
-        except Exception as e:
-            self.logger.error(f"Error processing image: {e}")
-            return PlateRecognitionResult(
-                plate_image=image,
                 characters=[],
                 success=False,
-                error_message=str(e),
+                error_message="Character extraction failed",
+            )
+
+        char_regions = sorted(char_regions, key=lambda x: x[1])
+        with self._time("hog"), span("hog", characters=len(char_regions)):
+            char_features = self._extract_hog_features_batch(
+                [char_img for char_img, _ in char_regions]
             )
 
-    def verify_access(self, plate_number: str) -> bool:
-        return plate_number in self.authorized_plates
+        with self._time("predict"), span("predict"):
+            predicted_chars = self.model.predict(char_features)
+
+        arabic_chars = self.translator.translate_to_arabic(predicted_chars)
+
+        self.logger.info(
+            f"Successfully processed image. Found {len(predicted_chars)} characters"
+        )
+        self._count_result("success")
+
+        return PlateRecognitionResult(
+            plate_image=car_plate,
+            characters=list(predicted_chars),
+            arabic_characters=arabic_chars,
+            success=True,
+            char_positions=[char_x for _, char_x in char_regions],
+        )
+
+    def process_batch(
+        self,
+        images_or_paths: Iterable[Union[np.ndarray, str, Path]],
+        workers: Optional[int] = None,
+        ordered: bool = True,
+        chunksize: int = 1,
+    ) -> Iterator:
+        """
+        Process many images across a pool of worker processes
+
+        Each worker builds its own controller, then decodes and recognizes
+        the images it is handed. A compiled model is published once in
+        shared memory, which the workers map read-only instead of loading
+        their own copy; other models are loaded by each worker from
+        model_path. Yields results in
+        input order, or (index, result) pairs as they finish when ordered
+        is False. workers defaults to the number of CPUs; with one worker
+        the images are processed in this process.
+        """
+        workers = workers or os.cpu_count() or 1
+
+        if workers == 1:
+            for index, item in enumerate(images_or_paths):
+                result = _recognize_batch_image(self, item)
+                yield result if ordered else (index, result)
+            return
+
+        # Only batches need worker processes, keep the import off startup
+        import multiprocessing
+
+        with self._model_lock:
+            model = self.model
+        shared_model = (
+            model.share() if isinstance(model, LinearOvOClassifier) else nullcontext()
+        )
+
+        with shared_model, multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_batch_worker,
+            # Workers only recognize plates, access is checked by the caller
+            initargs=(
+                str(self.model_path),
+                [],
+                self.translator.translation_map,
+                getattr(shared_model, "handle", None),
+            ),
+        ) as pool:
+            if ordered:
+                yield from pool.imap(
+                    _process_batch_image, images_or_paths, chunksize=chunksize
+                )
+            else:
+                yield from pool.imap_unordered(
+                    _process_batch_item,
+                    enumerate(images_or_paths),
+                    chunksize=chunksize,
+                )
+
+    def verify_access(self, plate_number: str, max_distance: float = 0) -> bool:
+        """
+        Exact lookup, or a fuzzy one when max_distance is positive
+
+        Fuzzy lookups are limited to the distance the plate index was built
+        for, 2 edits; a larger max_distance is clamped to it.
+        """
+        if plate_number in self.authorized_plates:
+            return True
+        if max_distance <= 0:
+            return False
+        return bool(self.find_similar_plates(plate_number, max_distance))
+
+    def find_similar_plates(self, plate_number: str, max_distance: float = 1):
+        """
+        Authorized plates within max_distance edits, as (plate, distance)
+
+        max_distance is clamped to the distance the index was built for, 2
+        edits, with a warning, rather than failing in an access check.
+        """
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyPlateIndex.from_store(self.authorized_plates)
+        if max_distance > self._fuzzy_index.max_distance:
+            self.logger.warning(
+                f"Fuzzy plate matching is limited to {self._fuzzy_index.max_distance} "
+                f"edits, got {max_distance}"
+            )
+            max_distance = self._fuzzy_index.max_distance
+        return self._fuzzy_index.search(plate_number, max_distance)
 
     def add_authorized_plate(self, plate_number: str) -> None:
         self.authorized_plates.add(plate_number)
 
     def remove_authorized_plate(self, plate_number: str) -> None:
-        self.authorized_plates.discard(plate_number)
+        self.authorized_plates.remove(plate_number)
+
+
+_worker_controller: Optional[GateAccessController] = None
+
+
+def _init_batch_worker(
+    model_path, authorized_plates, translation_map, shared_model=None
+):
+    global _worker_controller
+
+    # One process per core already, so keep OpenCV from oversubscribing
+    cv2.setNumThreads(1)
+    _worker_controller = GateAccessController(
+        model_path=model_path,
+        authorized_plates=authorized_plates,
+        translation_map=translation_map,
+        model=(
+            None if shared_model is None else LinearOvOClassifier.attach(shared_model)
+        ),
+    )
+
+
+def _recognize_batch_image(controller, item) -> PlateRecognitionResult:
+    if isinstance(item, (str, Path)):
+        image = cv2.imread(str(item))
+        if image is None:
+            return PlateRecognitionResult(
+                plate_image=None,
+                characters=[],
+                success=False,
+                error_message=f"Failed to read image: {item}",
+            )
+    else:
+        image = item
+
+    return controller.process_image(image)
+
+
+def _process_batch_image(item) -> PlateRecognitionResult:
+    return _recognize_batch_image(_worker_controller, item)
+
+
+def _process_batch_item(indexed_item):
+    index, item = indexed_item
+    return index, _process_batch_image(item)
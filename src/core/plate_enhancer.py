@@ -4,9 +4,11 @@ Preprocess the license plate image and enhance the license plate region.
 """
 
 import cv2 as cv
-import imutils
 import numpy as np
-from skimage import measure
+
+from core.tracing import annotate, span
+from utils.component_analysis import analyze_components, components_mask
+from utils.image_utils import resize_to_width
 
 
 class LicensePlateEnhancer:
@@ -28,8 +30,8 @@ class LicensePlateEnhancer:
 
         # Invert and resize image
         preprocessed_image = cv.bitwise_not(hsv_value_channel)
-        plate_img = imutils.resize(plate_img, width=200)
-        preprocessed_image = imutils.resize(preprocessed_image, width=200)
+        plate_img = resize_to_width(plate_img, 200)
+        preprocessed_image = resize_to_width(preprocessed_image, 200)
 
         return preprocessed_image, plate_img
 
@@ -48,80 +50,57 @@ class LicensePlateEnhancer:
 
     def _process_connected_components(self, preprocessed_image, plate_img):
         """Process connected components and filter based on characteristics"""
-        # Label connected components
-        labels = measure.label(preprocessed_image, background=0)
-
-        # Initialize images
-        self.black_mask = np.zeros(preprocessed_image.shape, dtype="uint8")
-        self.white_mask = np.zeros(preprocessed_image.shape, dtype="uint8")
-
-        # Process each labeled component
-        for label in np.unique(labels):
-            if label == 0:
-                continue
-
-            # Create label mask
-            current_label_mask = np.zeros(preprocessed_image.shape, dtype="uint8")
-            current_label_mask[labels == label] = 255
-
-            # Find contours
-            label_contours = cv.findContours(
-                current_label_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE
-            )
-            label_contours = (
-                label_contours[1] if imutils.is_cv3() else label_contours[0]
-            )
-
-            # Process contours
-            if len(label_contours) > 0:
-                self._filter_and_process_contour(
-                    label_contours, current_label_mask, plate_img
-                )
+        # Label connected components and collect their statistics
+        label_image, stats = analyze_components(preprocessed_image)
+        keep = self._filter_components(stats, plate_img)
+        annotate(components=len(stats), kept_components=int(keep.sum()))
+
+        # Build both masks with a single lookup each
+        self.white_mask = components_mask(label_image, stats)
+        self.black_mask = components_mask(label_image, stats, keep)
 
         return self.black_mask
 
-    def _filter_and_process_contour(
-        self, label_contours, current_label_mask, plate_img
-    ):
-        """Filter contours based on specific criteria"""
-        # Get the largest contour
-        largest_contour = max(label_contours, key=cv.contourArea)
-
-        # Calculate contour characteristics
-        (_, _, contour_width, contour_height) = cv.boundingRect(largest_contour)
-        area = cv.contourArea(largest_contour)
-        height_ratio = contour_height / float(plate_img.shape[0])
-        width_ratio = contour_width / float(plate_img.shape[1])
-        aspect_ratio = contour_width / float(contour_height)
-        contour_solidity = cv.contourArea(largest_contour) / float(
-            contour_width * contour_height
+    def _filter_components(self, stats, plate_img):
+        """Filter components based on specific criteria"""
+        height_ratio = stats.height / float(plate_img.shape[0])
+        width_ratio = stats.width / float(plate_img.shape[1])
+        contour_solidity = stats.solidity
+
+        return (
+            (stats.area >= 15)
+            & (stats.area < 650)
+            & (height_ratio < 0.9)
+            & (width_ratio < 0.3)
+            & (stats.aspect_ratio < 2)
+            & (contour_solidity > 0.2)
+            & (contour_solidity < 0.8)
         )
 
-        # Update white image
-        self.white_mask = cv.bitwise_or(self.white_mask, current_label_mask)
-
-        # Apply filtering criteria
-        if (
-            area >= 15
-            and area < 650
-            and height_ratio < 0.9
-            and width_ratio < 0.3
-            and aspect_ratio < 2
-            and contour_solidity > 0.2
-            and contour_solidity < 0.8
-        ):
-            self.black_mask = cv.bitwise_or(self.black_mask, current_label_mask)
+    def normalize_plate(self, plate_img):
+        """Validate the plate and bring it to the 200 px working size"""
+        if not self._is_validate_input(plate_img):
+            return None
+
+        return self._convert_and_resize_image(plate_img)
 
     def enhance_plate(self, plate_img):
         """Main enhancement method"""
-        # Validate input
-        if not self._is_validate_input(plate_img):
-            return []
+        with span("enhance_plate"):
+            # Validate input, convert and resize image
+            normalized = self.normalize_plate(plate_img)
+            if normalized is None:
+                return []
 
-        # Convert and resize image
-        self.preprocessed_image, self.plate_img = self._convert_and_resize_image(
-            plate_img
-        )
+            return self.enhance_normalized_plate(*normalized)
+
+    def enhance_normalized_plate(self, preprocessed_image, plate_img):
+        """Enhance a plate already returned by normalize_plate"""
+        with span("enhance_normalized_plate"):
+            return self._enhance_normalized_plate(preprocessed_image, plate_img)
+
+    def _enhance_normalized_plate(self, preprocessed_image, plate_img):
+        self.preprocessed_image, self.plate_img = preprocessed_image, plate_img
 
         # Apply thresholding
         self.preprocessed_image = self._apply_thresholding(self.preprocessed_image)
@@ -0,0 +1,167 @@
+"""
+Plate Voting
+Aggregate character predictions over consecutive frames of one vehicle.
+Characters are aligned by their x position on the normalized plate and
+voted on per position, and a decision is emitted as soon as every position
+is confident enough, or after a maximum number of frames.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class PlateDecision:
+    characters: List[str]
+    arabic_characters: List[str]
+    confidence: float
+    frames_used: int
+
+    @property
+    def plate_text(self):
+        return " ".join(self.arabic_characters)
+
+
+@dataclass
+class _PositionSlot:
+    x: float
+    observations: int = 0
+    votes: Counter = field(default_factory=Counter)
+
+
+class PlateVoter:
+    def __init__(
+        self,
+        min_frames=2,
+        max_frames=8,
+        confidence_threshold=0.75,
+        position_tolerance=6,
+        hold_frames=50,
+    ):
+        """
+        Initialize the Plate Voter
+
+        A decision needs at least min_frames successful frames and every
+        position agreeing on its character in confidence_threshold of them.
+        After max_frames frames the best guess so far is emitted, provided
+        at least one frame was read. Characters within position_tolerance
+        pixels of a position are counted for it. Once decided, the vehicle
+        is not processed again for hold_frames frames, or until reset.
+        """
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.confidence_threshold = confidence_threshold
+        self.position_tolerance = position_tolerance
+        self.hold_frames = hold_frames
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start collecting votes for a new vehicle"""
+        with self._lock:
+            self._reset()
+
+    @property
+    def decided(self):
+        return self.decision is not None
+
+    def should_process(self):
+        """Whether the next frame is still needed; counts held frames"""
+        with self._lock:
+            if self.decision is None:
+                return True
+
+            self._held_frames += 1
+            if self._held_frames > self.hold_frames:
+                self._reset()
+                return True
+            return False
+
+    def add(self, result) -> Optional[PlateDecision]:
+        """
+        Add one frame's PlateRecognitionResult; returns the decision once made
+
+        Cached results are ignored: they repeat a frame already read, so
+        they are no new evidence and do not count toward max_frames.
+        """
+        with self._lock:
+            if self.decision is not None or result.cached:
+                return None
+
+            self.frames_seen += 1
+            if result.success and result.characters:
+                self._add_characters(result)
+
+            if self.frames_read >= self.min_frames:
+                decision = self._current_decision()
+                if decision.confidence >= self.confidence_threshold:
+                    self.decision = decision
+                    return decision
+
+            if self.frames_seen >= self.max_frames:
+                if self.frames_read == 0:
+                    # Nothing was read for this vehicle yet, keep trying
+                    self._reset()
+                    return None
+                self.decision = self._current_decision()
+                return self.decision
+
+            return None
+
+    def _reset(self):
+        self.slots = []
+        self.frames_seen = 0
+        self.frames_read = 0
+        self.decision = None
+        self._held_frames = 0
+
+    def _add_characters(self, result):
+        self.frames_read += 1
+
+        arabic_characters = result.arabic_characters or result.characters
+        positions = result.char_positions or list(range(len(result.characters)))
+        used_slots = set()
+
+        for x, character, arabic in sorted(
+            zip(positions, result.characters, arabic_characters)
+        ):
+            slot = self._nearest_slot(x, used_slots)
+            if slot is None:
+                slot = _PositionSlot(x=float(x))
+                self.slots.append(slot)
+            else:
+                slot.x += (x - slot.x) / (slot.observations + 1)
+
+            used_slots.add(id(slot))
+            slot.observations += 1
+            slot.votes[(str(character), str(arabic))] += 1
+
+    def _nearest_slot(self, x, used_slots):
+        nearest, nearest_distance = None, self.position_tolerance
+        for slot in self.slots:
+            distance = abs(slot.x - x)
+            if id(slot) not in used_slots and distance <= nearest_distance:
+                nearest, nearest_distance = slot, distance
+        return nearest
+
+    def _current_decision(self):
+        # Positions missing from most frames are segmentation noise
+        slots = sorted(
+            (slot for slot in self.slots if 2 * slot.observations > self.frames_read),
+            key=lambda slot: slot.x,
+        )
+
+        winners = [slot.votes.most_common(1)[0] for slot in slots]
+        confidence = min(
+            (count / self.frames_read for _, count in winners), default=0.0
+        )
+
+        return PlateDecision(
+            characters=[character for (character, _), _ in winners],
+            arabic_characters=[arabic for (_, arabic), _ in winners],
+            confidence=confidence,
+            frames_used=self.frames_seen,
+        )
@@ -0,0 +1,241 @@
+"""
+Stream Recording
+Record camera frames with their capture timestamps into a single seekable
+file, and replay a recording as a video source in real time, at N times
+speed or as fast as possible.
+
+A recording is a JSON header, then one record per frame (length,
+timestamp and the encoded image), then an index of all records. When the
+index is missing, for example after a crash, the records are scanned.
+"""
+
+import json
+import struct
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+MAGIC = b"CRBREC01"
+INDEX_MAGIC = b"CRBIDX01"
+
+_HEADER_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<Id")
+_INDEX_ENTRY = np.dtype([("offset", "<u8"), ("length", "<u4"), ("timestamp", "<f8")])
+_TRAILER = struct.Struct("<QI8s")
+
+
+class StreamRecorder:
+    def __init__(self, path, codec: str = ".jpg", quality: int = 90):
+        """
+        Initialize the Stream Recorder
+
+        Frames are stored encoded with codec (".jpg" for compact files,
+        ".png" for lossless ones). Timestamps are seconds since the first
+        frame.
+        """
+        self.path = Path(path)
+        self.codec = codec
+        self.params = (
+            [cv2.IMWRITE_JPEG_QUALITY, quality] if codec in (".jpg", ".jpeg") else []
+        )
+        self._file = open(self.path, "wb")
+        self._index = []
+        self._start = None
+
+        header = json.dumps({"codec": codec, "created": time.time()}).encode("utf-8")
+        self._file.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __len__(self):
+        return len(self._index)
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> None:
+        """Append a frame, captured now unless a monotonic timestamp is given"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        if self._start is None:
+            self._start = timestamp
+
+        ok, encoded = cv2.imencode(self.codec, frame, self.params)
+        if not ok:
+            raise ValueError(f"Could not encode frame {len(self._index)}")
+
+        data = encoded.tobytes()
+        offset = self._file.tell()
+        self._file.write(_RECORD.pack(len(data), timestamp - self._start) + data)
+        self._index.append((offset, len(data), timestamp - self._start))
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        index_offset = self._file.tell()
+        self._file.write(np.array(self._index, dtype=_INDEX_ENTRY).tobytes())
+        self._file.write(_TRAILER.pack(index_offset, len(self._index), INDEX_MAGIC))
+        self._file.close()
+
+
+def record_stream(
+    source,
+    path,
+    max_frames: Optional[int] = None,
+    duration: Optional[float] = None,
+    **recorder_options,
+) -> int:
+    """Record a camera index, URL or video file; returns the frame count"""
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+
+    start = time.monotonic()
+    try:
+        with StreamRecorder(path, **recorder_options) as recorder:
+            while max_frames is None or len(recorder) < max_frames:
+                ret, frame = capture.read()
+                now = time.monotonic()
+                if not ret or (duration is not None and now - start > duration):
+                    break
+                recorder.write(frame, now)
+            return len(recorder)
+    finally:
+        capture.release()
+
+
+class StreamRecording:
+    """Random access to the frames of a recording"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"Not a stream recording: {self.path}")
+        (header_length,) = _HEADER_LENGTH.unpack(self._file.read(_HEADER_LENGTH.size))
+        self.header = json.loads(self._file.read(header_length))
+        self._data_start = self._file.tell()
+
+        self.index = self._read_index()
+        if self.index is None:
+            self.index = self._scan_records()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.index["timestamp"]
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[-1]) if len(self) else 0.0
+
+    def _read_index(self):
+        self._file.seek(0, 2)
+        end = self._file.tell()
+        if end - self._data_start < _TRAILER.size:
+            return None
+
+        self._file.seek(end - _TRAILER.size)
+        index_offset, count, magic = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        if magic != INDEX_MAGIC:
+            return None
+
+        self._file.seek(index_offset)
+        return np.frombuffer(
+            self._file.read(count * _INDEX_ENTRY.itemsize), dtype=_INDEX_ENTRY
+        )
+
+    def _scan_records(self):
+        """Rebuild the index of a recording that was not closed"""
+        entries = []
+        file_size = self._file.seek(0, 2)
+        offset = self._data_start
+        while offset + _RECORD.size <= file_size:
+            self._file.seek(offset)
+            length, timestamp = _RECORD.unpack(self._file.read(_RECORD.size))
+            if offset + _RECORD.size + length > file_size:
+                # Truncated last frame
+                break
+            entries.append((offset, length, timestamp))
+            offset += _RECORD.size + length
+        return np.array(entries, dtype=_INDEX_ENTRY)
+
+    def read_frame(self, position: int) -> np.ndarray:
+        """Decode the frame at position"""
+        offset, length, _ = self.index[position]
+        self._file.seek(int(offset) + _RECORD.size)
+        data = np.frombuffer(self._file.read(int(length)), np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    def seek_time(self, seconds: float) -> int:
+        """Position of the first frame captured at or after seconds"""
+        return int(np.searchsorted(self.timestamps, seconds))
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for position in range(len(self)):
+            yield self.read_frame(position)
+
+
+class ReplaySource:
+    """
+    Video source replaying a recording, used like cv2.VideoCapture
+
+    With speed 1.0 frames are released at their recorded times, with speed
+    N at N times that rate, and with speed None as fast as they are read.
+    Frames are decoded ahead of their release time, so decoding does not
+    delay them.
+    """
+
+    def __init__(
+        self, recording: StreamRecording, speed: Optional[float] = 1.0, start: int = 0
+    ):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive, or None for no pacing")
+
+        self.recording = recording
+        self.speed = speed
+        self.position = start
+        self.frames_read = 0
+        self._clock_start = None
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self):
+        if self.position >= len(self.recording):
+            return False, None
+
+        frame = self.recording.read_frame(self.position)
+        if self.speed is not None:
+            due = float(self.recording.timestamps[self.position]) / self.speed
+            if self._clock_start is None:
+                self._clock_start = time.monotonic() - due
+            delay = self._clock_start + due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.position += 1
+        self.frames_read += 1
+        return True, frame
+
+    def release(self) -> None:
+        pass
@@ -0,0 +1,139 @@
+"""
+Plate Result Cache
+Remember recognition results for recently seen plate crops. Crops are
+fingerprinted with a difference hash of the normalized 200 px plate, so a
+car waiting at the barrier is segmented and classified once rather than on
+every frame.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _CacheEntry:
+    fingerprint: int
+    shape: tuple
+    created: float
+    result: object
+
+
+class PlateResultCache:
+    def __init__(
+        self,
+        max_entries=32,
+        ttl=2.0,
+        hash_size=16,
+        max_distance=12,
+        max_height_difference=2,
+    ):
+        """
+        Initialize the Plate Result Cache
+
+        Holds at most max_entries results, least recently used first out,
+        each for at most ttl seconds after it was computed. Two crops match
+        when their hash_size x hash_size difference hashes differ in at most
+        max_distance bits and their normalized heights in at most
+        max_height_difference pixels.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.max_height_difference = max_height_difference
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def fingerprint(self, normalized_plate):
+        """Difference hash of a normalized plate crop, as an int"""
+        small = cv.resize(
+            normalized_plate,
+            (self.hash_size + 1, self.hash_size),
+            interpolation=cv.INTER_AREA,
+        )
+        bits = small[:, 1:] > small[:, :-1]
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+    def get(self, fingerprint, shape) -> Optional[object]:
+        """Return the result cached for a near-duplicate crop, if any"""
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire(now)
+
+            key = self._match(fingerprint, shape)
+            if key is None:
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return self._entries[key].result
+
+    def put(self, fingerprint, shape, result) -> None:
+        with self._lock:
+            self._entries[fingerprint] = _CacheEntry(
+                fingerprint, shape, time.monotonic(), result
+            )
+            self._entries.move_to_end(fingerprint)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**vars(self._stats))
+
+    def _expire(self, now):
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if now - entry.created > self.ttl
+        ]
+        for key in expired:
+            del self._entries[key]
+        self._stats.expirations += len(expired)
+
+    def _match(self, fingerprint, shape):
+        entry = self._entries.get(fingerprint)
+        if entry is not None and self._same_size(entry.shape, shape):
+            return fingerprint
+
+        best_key, best_distance = None, self.max_distance + 1
+        for key, entry in self._entries.items():
+            if not self._same_size(entry.shape, shape):
+                continue
+            distance = (entry.fingerprint ^ fingerprint).bit_count()
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+
+        return best_key
+
+    def _same_size(self, shape1, shape2):
+        return abs(shape1[0] - shape2[0]) <= self.max_height_difference
@@ -0,0 +1,444 @@
+"""
+Recognition Service
+Asyncio HTTP endpoint on localhost recognizing plates in posted frames, so
+lane cameras and back-office tools can share one recognition host.
+
+Requests are recognized concurrently on a thread pool, one controller per
+thread, and the character crops of concurrent requests are classified
+together in micro-batches: one predict call per batch instead of one per
+plate. Requests beyond max_pending, counting uploads still being read,
+are turned away with 503 before their body is read.
+
+POST /recognize takes an encoded image (JPEG, PNG, ...) as the body, or a
+raw uint8 frame sent as application/octet-stream with X-Frame-Width,
+X-Frame-Height and optionally X-Frame-Channels (1 or 3, BGR, default 3).
+The result is returned as JSON. GET /health reports the load.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+from core.pipeline import GateAccessController
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ServiceOverloaded(RuntimeError):
+    """Raised when a request arrives while max_pending requests are queued"""
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class MicroBatcher:
+    """
+    Classify the character features of concurrent requests in one call
+
+    Recognition threads call predict, which blocks until their rows were
+    classified. The batcher runs on the event loop and closes a batch when
+    every job running on the threads has submitted its rows, when it holds
+    max_batch rows, or max_wait_ms after its first rows arrived, whichever
+    comes first. A request alone is classified without waiting.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[np.ndarray], np.ndarray],
+        loop: asyncio.AbstractEventLoop,
+        max_batch: int = 256,
+        max_wait_ms: float = 5.0,
+    ):
+        self._predict = predict
+        self._loop = loop
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.rows = 0
+
+        self._pending = []
+        self._closed = False
+        # Jobs on the threads that may still submit rows
+        self._expected = 0
+        self._changed = asyncio.Event()
+        self._local = threading.local()
+
+    @contextmanager
+    def job(self):
+        """Scope one recognition on a thread, which predicts at most once"""
+        self._local.submitted = False
+        self._loop.call_soon_threadsafe(self._job_started)
+        try:
+            yield
+        finally:
+            if not self._local.submitted:
+                self._loop.call_soon_threadsafe(self._job_skipped)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Classify features with the next batch; called from the threads"""
+        self._local.submitted = True
+        future = concurrent.futures.Future()
+        self._loop.call_soon_threadsafe(self._submit, features, future)
+        return future.result()
+
+    def _job_started(self):
+        self._expected += 1
+
+    def _job_skipped(self):
+        self._expected -= 1
+        self._changed.set()
+
+    def _submit(self, features, future):
+        self._expected -= 1
+        if self._closed:
+            future.set_exception(RuntimeError("The service is stopping"))
+            return
+        self._pending.append((features, future))
+        self._changed.set()
+
+    async def run(self) -> None:
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            if not self._pending:
+                continue
+
+            deadline = self._loop.time() + self.max_wait
+            while self._expected > 0 and self._pending_rows() < self.max_batch:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._changed.clear()
+
+            batch, self._pending = self._pending, []
+            self._classify(batch)
+
+    def close(self) -> None:
+        """Fail the rows waiting for a batch, and any submitted later"""
+        self._closed = True
+        batch, self._pending = self._pending, []
+        for _, future in batch:
+            future.set_exception(RuntimeError("The service is stopping"))
+
+    def _pending_rows(self) -> int:
+        return sum(len(features) for features, _ in self._pending)
+
+    def _classify(self, batch):
+        self.batches += 1
+        self.rows += sum(len(features) for features, _ in batch)
+        try:
+            # A matrix product and a vote, cheap enough to run on the loop
+            labels = self._predict(np.concatenate([rows for rows, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for features, future in batch:
+            future.set_result(labels[start : start + len(features)])
+            start += len(features)
+
+
+class RecognitionService:
+    def __init__(
+        self,
+        controller: GateAccessController,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: Optional[int] = None,
+        max_pending: int = 64,
+        max_batch: int = 256,
+        max_wait_ms: float = 5.0,
+        max_body: int = 32 * 1024 * 1024,
+    ):
+        """
+        Initialize the Recognition Service
+
+        The enhancer and extractor keep per-image state, so each of the
+        workers threads recognizes with its own controller, whose model
+        hands its features to the micro-batcher. Batches are classified
+        with the given controller's model, following its hot-swaps, and
+        access is checked against its authorized plates. workers defaults
+        to twice the CPUs, as threads wait on their batch.
+        """
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self.workers = workers or 2 * (os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.max_body = max_body
+
+        self.batcher: Optional[MicroBatcher] = None
+        self.pending = 0
+        # Admitted uploads whose body is still being read
+        self.receiving = 0
+        self._executor = None
+        self._server = None
+        self._batch_task = None
+        self._local = threading.local()
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Listen on the running loop; port 0 picks a free port"""
+        loop = asyncio.get_running_loop()
+        self.batcher = MicroBatcher(
+            lambda features: self.controller.model.predict(features),
+            loop,
+            max_batch=self.max_batch,
+            max_wait_ms=self.max_wait_ms,
+        )
+        self._batch_task = loop.create_task(self.batcher.run())
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="recognition"
+        )
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            self._batch_task = None
+            # Threads waiting on a batch return an error result instead
+            self.batcher.close()
+
+    async def recognize(self, image: np.ndarray) -> dict:
+        """Recognize a decoded frame and check its access"""
+        return await self._recognize(lambda: image)
+
+    async def _recognize(self, load: Callable[[], np.ndarray]) -> dict:
+        if self._overloaded():
+            raise ServiceOverloaded(f"{self.pending} requests already pending")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, self._process, load)
+        finally:
+            self.pending -= 1
+
+        response = result.to_dict()
+        response["access_granted"] = result.plate_text is not None and (
+            self.controller.verify_access(result.plate_text)
+        )
+        return response
+
+    def _overloaded(self) -> bool:
+        return self.pending + self.receiving >= self.max_pending
+
+    def _process(self, load):
+        # Decoding runs here too, off the event loop
+        image = load()
+        with self.batcher.job():
+            return self._thread_controller().process_image(image)
+
+    def _thread_controller(self) -> GateAccessController:
+        controller = getattr(self._local, "controller", None)
+        if controller is None:
+            controller = GateAccessController(
+                model_path=self.controller.model_path,
+                translation_map=self.controller.translator.translation_map,
+                model=self.batcher,
+            )
+            self._local.controller = controller
+        return controller
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _HTTPError as e:
+                    # The rest of the request is unread, so the connection ends
+                    await self._send(
+                        writer, e.status, {"error": str(e)}, False, e.headers
+                    )
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                status, payload, extra_headers = await self._route(
+                    method, path, headers, body
+                )
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._send(writer, status, payload, keep_alive, extra_headers)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_line(self, reader, status: int, message: str) -> bytes:
+        try:
+            return await reader.readline()
+        except ValueError:
+            # Lines longer than the stream's limit (64 KiB)
+            raise _HTTPError(status, message)
+
+    async def _read_request(self, reader):
+        request_line = await self._read_line(reader, 400, "Request line too long")
+        if not request_line.strip():
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            raise _HTTPError(400, "Malformed request line")
+
+        path = target.split("?")[0]
+
+        headers = {}
+        while True:
+            line = await self._read_line(reader, 431, "Header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= 100:
+                raise _HTTPError(431, "Too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        if method == "POST":
+            if "content-length" not in headers:
+                raise _HTTPError(411, "Content-Length is required")
+            try:
+                length = int(headers["content-length"])
+            except ValueError:
+                raise _HTTPError(400, "Invalid Content-Length")
+            if length > self.max_body:
+                raise _HTTPError(413, f"Bodies are limited to {self.max_body} bytes")
+
+            # Turn uploads away before buffering them when overloaded
+            if path == "/recognize" and self._overloaded():
+                raise _HTTPError(
+                    503,
+                    f"{self.pending} requests already pending",
+                    {"Retry-After": "1"},
+                )
+            self.receiving += 1
+            try:
+                body = await reader.readexactly(length)
+            finally:
+                self.receiving -= 1
+
+        return method, path, headers, body
+
+    async def _route(self, method, path, headers, body):
+        if path == "/health":
+            return (
+                200,
+                {
+                    "status": "ok",
+                    "pending": self.pending,
+                    "receiving": self.receiving,
+                    "workers": self.workers,
+                    "batches": self.batcher.batches,
+                    "rows": self.batcher.rows,
+                },
+                {},
+            )
+        if path != "/recognize":
+            return 404, {"error": "Not found"}, {}
+        if method != "POST":
+            return 405, {"error": "Use POST"}, {"Allow": "POST"}
+        if not body:
+            return 400, {"error": "Empty body"}, {}
+
+        try:
+            load = _frame_loader(headers, body)
+            return 200, await self._recognize(load), {}
+        except ServiceOverloaded as e:
+            return 503, {"error": str(e)}, {"Retry-After": "1"}
+        except ValueError as e:
+            return 400, {"error": str(e)}, {}
+        except Exception as e:
+            logger.exception("Recognition failed")
+            return 500, {"error": str(e)}, {}
+
+    async def _send(self, writer, status, payload, keep_alive, extra_headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        lines: List[str] = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def _frame_loader(headers: dict, body: bytes) -> Callable[[], np.ndarray]:
+    """Check a posted frame and return how to decode it"""
+    if headers.get("content-type", "").split(";")[0] != "application/octet-stream":
+
+        def decode():
+            image = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError("Could not decode the image")
+            return image
+
+        return decode
+
+    try:
+        width = int(headers["x-frame-width"])
+        height = int(headers["x-frame-height"])
+        channels = int(headers.get("x-frame-channels", 3))
+    except (KeyError, ValueError):
+        raise ValueError("Raw frames need X-Frame-Width and X-Frame-Height")
+    if channels not in (1, 3) or width * height * channels != len(body):
+        raise ValueError(f"Expected {width}x{height}x{channels} bytes, got {len(body)}")
+
+    shape = (height, width) if channels == 1 else (height, width, 3)
+    frame = np.frombuffer(body, np.uint8).reshape(shape)
+    if channels == 1:
+        return lambda: cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    return lambda: frame
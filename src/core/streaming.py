@@ -0,0 +1,397 @@
+"""
+Streaming Pipeline
+Run capture, plate detection, character OCR and the access decision as
+separate threads connected by bounded queues, dropping stale frames so
+results stay fresh when recognition is slower than the camera.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import cv2
+import numpy as np
+
+from core.motion_gate import MotionGate
+from core.pipeline import GateAccessController, PlateRecognitionResult
+from core.plate_voting import PlateDecision, PlateVoter
+from core.tracing import FrameTrace, activate
+
+logger = logging.getLogger(__name__)
+
+DROP_POLICIES = ("latest", "block")
+
+# Marks the end of the stream as it travels through the queues
+_END_OF_STREAM = object()
+
+
+@dataclass
+class StreamFrame:
+    """A captured frame and what each stage has produced for it so far"""
+
+    index: int
+    frame: np.ndarray
+    capture_time: float
+    plate: Optional[np.ndarray] = None
+    result: Optional[PlateRecognitionResult] = None
+    trace: Optional[FrameTrace] = None
+
+
+@dataclass
+class StreamResult:
+    """Output of the decision stage for one frame"""
+
+    index: int
+    frame: np.ndarray
+    result: PlateRecognitionResult
+    plate_text: Optional[str]
+    access_granted: bool
+    latency: float
+    decision: Optional[PlateDecision] = None
+    capture_time: Optional[float] = None
+
+
+@dataclass
+class StreamStats:
+    """Counters and end-to-end latency percentiles, in seconds"""
+
+    frames_captured: int = 0
+    frames_completed: int = 0
+    frames_gated: int = 0
+    frames_held: int = 0
+    frames_dropped: Dict[str, int] = field(default_factory=dict)
+    latency_p50: Optional[float] = None
+    latency_p95: Optional[float] = None
+    latency_p99: Optional[float] = None
+
+    @property
+    def total_dropped(self):
+        return sum(self.frames_dropped.values())
+
+
+class StreamingPipeline:
+    """
+    Multi-stage threaded runner around a GateAccessController
+
+    Each stage owns the controller components it uses (the detector for
+    detection, the enhancer, extractor and model for OCR), so the stages
+    never share mutable state. Queues hold at most queue_size frames. With
+    the "latest" drop policy a full queue discards its oldest frame, so a
+    slow stage always works on the freshest frame; with "block" upstream
+    stages wait instead and nothing is dropped.
+
+    Frame drops and end-to-end latency are also reported to the
+    controller's PipelineMetrics, and frames sampled by its FrameTracer are
+    traced across the detection and OCR threads.
+
+    An optional MotionGate is checked in the capture stage, and frames it
+    rejects never enter the queues.
+
+    With a PlateVoter, access is decided from the votes of consecutive
+    frames rather than from each frame alone. Once a vehicle is decided its
+    frames are held back in the capture stage until the voter's hold
+    expires or the motion gate closes.
+
+    on_frame, when given, is called from the capture thread with every
+    frame read, before gating and dropping, so a display can show the full
+    feed while recognition runs at its own rate.
+    """
+
+    def __init__(
+        self,
+        controller: GateAccessController,
+        source: Any,
+        queue_size: int = 1,
+        drop_policy: str = "latest",
+        on_result: Optional[Callable[[StreamResult], None]] = None,
+        latency_window: int = 1000,
+        motion_gate: Optional[MotionGate] = None,
+        voter: Optional[PlateVoter] = None,
+        on_frame: Optional[Callable[[np.ndarray], None]] = None,
+    ):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Unknown drop policy {drop_policy!r}, expected one of {DROP_POLICIES}"
+            )
+
+        self.controller = controller
+        self.source = source
+        self.drop_policy = drop_policy
+        self.on_result = on_result
+        self.on_frame = on_frame
+        self.motion_gate = motion_gate
+        self.voter = voter
+
+        self.detection_queue = queue.Queue(maxsize=queue_size)
+        self.ocr_queue = queue.Queue(maxsize=queue_size)
+        self.decision_queue = queue.Queue(maxsize=queue_size)
+        self.output_queue = queue.Queue(maxsize=queue_size)
+
+        self._stop_event = threading.Event()
+        # Set once the consumer is gone, so queued items may be pushed out
+        self._abort_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._frames_captured = 0
+        self._frames_completed = 0
+        self._frames_gated = 0
+        self._frames_held = 0
+        self._frames_dropped = {
+            "detection": 0,
+            "ocr": 0,
+            "decision": 0,
+            "output": 0,
+        }
+        self._threads = []
+
+    def start(self) -> "StreamingPipeline":
+        stages = [
+            ("capture", self._capture_stage),
+            ("detection", self._detection_stage),
+            ("ocr", self._ocr_stage),
+            ("decision", self._decision_stage),
+        ]
+        self._threads = [
+            threading.Thread(target=target, name=f"stream-{name}", daemon=True)
+            for name, target in stages
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop capturing; frames already in flight are drained"""
+        self._stop_event.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the stream to end
+
+        If it has not ended within timeout the consumer is taken to be gone:
+        the stages then push queued items out instead of waiting for room.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+        if any(thread.is_alive() for thread in self._threads):
+            self._abort_event.set()
+
+    def results(
+        self, timeout: Optional[float] = None
+    ) -> Iterator[Optional[StreamResult]]:
+        """
+        Yield decisions as they are made, until the stream ends
+
+        Only used when no on_result callback was given. With a timeout,
+        None is yielded whenever no result arrived within it, so a display
+        loop keeps running while the motion gate holds results back.
+        Closing the generator before the end tells the stages that nobody
+        reads the results anymore.
+        """
+        try:
+            while True:
+                try:
+                    item = self.output_queue.get(timeout=timeout)
+                except queue.Empty:
+                    yield None
+                    continue
+                if item is _END_OF_STREAM:
+                    return
+                yield item
+        finally:
+            self._abort_event.set()
+
+    def stats(self) -> StreamStats:
+        with self._stats_lock:
+            latencies = np.array(self._latencies)
+            stats = StreamStats(
+                frames_captured=self._frames_captured,
+                frames_completed=self._frames_completed,
+                frames_gated=self._frames_gated,
+                frames_held=self._frames_held,
+                frames_dropped=dict(self._frames_dropped),
+            )
+
+        if len(latencies):
+            stats.latency_p50, stats.latency_p95, stats.latency_p99 = np.percentile(
+                latencies, [50, 95, 99]
+            )
+        return stats
+
+    def _put(self, stage_queue, item, stage):
+        """Enqueue item for stage, applying the drop policy when full"""
+        if self.drop_policy == "block" or item is _END_OF_STREAM:
+            # The end marker waits for room rather than displacing a frame,
+            # unless the consumer is gone and nothing would ever make room
+            while not self._abort_event.is_set():
+                try:
+                    stage_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        while True:
+            try:
+                stage_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    stage_queue.get_nowait()
+                except queue.Empty:
+                    continue
+                with self._stats_lock:
+                    self._frames_dropped[stage] += 1
+                if self.controller.metrics is not None:
+                    self.controller.metrics.increment("frames_dropped", stage)
+
+    def _open_source(self):
+        if isinstance(self.source, (int, str)):
+            capture = cv2.VideoCapture(self.source)
+            if not capture.isOpened():
+                raise ValueError(f"Could not open video source: {self.source}")
+            return capture
+        return self.source
+
+    def _capture_stage(self):
+        capture = None
+        try:
+            capture = self._open_source()
+            index = 0
+            gate_open = False
+            while not self._stop_event.is_set():
+                ret, frame = capture.read()
+                if not ret:
+                    break
+
+                with self._stats_lock:
+                    self._frames_captured += 1
+
+                if self.on_frame is not None:
+                    self.on_frame(frame)
+
+                if self.motion_gate is not None and not self.motion_gate.update(frame):
+                    with self._stats_lock:
+                        self._frames_gated += 1
+                    # The lane went quiet, so the vehicle has left, decided or not
+                    if gate_open and self.voter is not None:
+                        self.voter.reset()
+                    gate_open = False
+                    continue
+                gate_open = True
+
+                if self.voter is not None and not self.voter.should_process():
+                    with self._stats_lock:
+                        self._frames_held += 1
+                    continue
+
+                self._put(
+                    self.detection_queue,
+                    StreamFrame(index, frame, time.monotonic()),
+                    "detection",
+                )
+                index += 1
+        except Exception as e:
+            logger.error(f"Capture stage failed: {e}")
+        finally:
+            if capture is not None and capture is not self.source:
+                capture.release()
+            self._put(self.detection_queue, _END_OF_STREAM, "detection")
+
+    def _detection_stage(self):
+        while True:
+            item = self.detection_queue.get()
+            if item is _END_OF_STREAM:
+                self._put(self.ocr_queue, _END_OF_STREAM, "ocr")
+                return
+
+            if self.controller.tracer is not None:
+                item.trace = self.controller.tracer.start_frame(item.index)
+
+            try:
+                with activate(item.trace):
+                    item.plate = self.controller.detect_plate(np.array(item.frame))
+            except Exception as e:
+                item.result = self._error_result(item, e)
+            self._put(self.ocr_queue, item, "ocr")
+
+    def _ocr_stage(self):
+        while True:
+            item = self.ocr_queue.get()
+            if item is _END_OF_STREAM:
+                self._put(self.decision_queue, _END_OF_STREAM, "decision")
+                return
+
+            if item.result is None:
+                try:
+                    with activate(item.trace):
+                        item.result = self.controller.recognize_plate(
+                            item.plate, item.frame
+                        )
+                except Exception as e:
+                    item.result = self._error_result(item, e)
+            self._put(self.decision_queue, item, "decision")
+
+    def _decision_stage(self):
+        while True:
+            item = self.decision_queue.get()
+            if item is _END_OF_STREAM:
+                self._put(self.output_queue, _END_OF_STREAM, "output")
+                return
+
+            plate_text = None
+            access_granted = False
+            decision = None
+            if self.voter is not None:
+                decision = self.voter.add(item.result)
+                if decision is not None:
+                    plate_text = decision.plate_text
+                    access_granted = self.controller.verify_access(plate_text)
+            elif item.result.success and item.result.arabic_characters:
+                plate_text = " ".join(item.result.arabic_characters)
+                access_granted = self.controller.verify_access(plate_text)
+
+            if self.controller.tracer is not None:
+                self.controller.tracer.finish_frame(item.trace)
+
+            latency = time.monotonic() - item.capture_time
+            with self._stats_lock:
+                self._frames_completed += 1
+                self._latencies.append(latency)
+            if self.controller.metrics is not None:
+                self.controller.metrics.observe("end_to_end", latency)
+
+            stream_result = StreamResult(
+                index=item.index,
+                frame=item.frame,
+                result=item.result,
+                plate_text=plate_text,
+                access_granted=access_granted,
+                latency=latency,
+                decision=decision,
+                capture_time=item.capture_time,
+            )
+            if self.on_result is None:
+                self._put(self.output_queue, stream_result, "output")
+                continue
+
+            try:
+                self.on_result(stream_result)
+            except Exception as e:
+                logger.error(f"Result callback failed: {e}")
+
+    def _error_result(self, item, error):
+        logger.error(f"Error processing frame {item.index}: {error}")
+        if self.controller.metrics is not None:
+            self.controller.metrics.increment("results", "error")
+        return PlateRecognitionResult(
+            plate_image=item.frame,
+            characters=[],
+            success=False,
+            error_message=str(error),
+        )
@@ -0,0 +1,238 @@
+"""
+Frame Tracing
+Opt-in per-frame profiling. A sampled frame records nested spans from the
+detector, enhancer, extractor and classifier, with counts attached, and
+the kept frames export as Chrome trace-event JSON for chrome://tracing or
+Perfetto.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import List, Optional
+
+# Trace of the frame being processed on each thread
+_active = threading.local()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.trace._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self.trace._stack.pop()
+        thread = threading.current_thread()
+        self.trace.thread_names[thread.ident] = thread.name
+        self.trace.events.append(
+            {
+                "name": self.name,
+                "ph": "X",
+                "ts": self.trace.tracer._timestamp(self.start),
+                "dur": (end - self.start) * 1e6,
+                "pid": self.trace.tracer.pid,
+                "tid": thread.ident,
+                "args": self.args,
+            }
+        )
+        return False
+
+
+class FrameTrace:
+    """Spans recorded for one frame, possibly across several threads"""
+
+    def __init__(self, tracer, frame_id, sampled):
+        self.tracer = tracer
+        self.frame_id = frame_id
+        self.sampled = sampled
+        self.start = time.perf_counter()
+        self.duration = None
+        self.events: List[dict] = []
+        self.thread_names = {}
+        self._stack: List[_Span] = []
+
+    def activate(self):
+        """Make this the current trace of the calling thread"""
+        return _Activation(self)
+
+
+class _Activation:
+    __slots__ = ("trace", "previous")
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __enter__(self):
+        self.previous = getattr(_active, "trace", None)
+        _active.trace = self.trace
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        _active.trace = self.previous
+        return False
+
+
+def activate(trace: Optional[FrameTrace]):
+    """Activate trace on this thread; does nothing for frames not traced"""
+    return nullcontext() if trace is None else trace.activate()
+
+
+def span(name: str, **args):
+    """Nested span in the current frame's trace, if it is being traced"""
+    trace = getattr(_active, "trace", None)
+    if trace is None:
+        return nullcontext()
+    return _Span(trace, name, args)
+
+
+def annotate(**args) -> None:
+    """Attach values, such as counts, to the innermost open span"""
+    trace = getattr(_active, "trace", None)
+    if trace is not None and trace._stack:
+        trace._stack[-1].args.update(args)
+
+
+class _FrameScope:
+    def __init__(self, tracer, frame_id):
+        self.tracer = tracer
+        self.frame_id = frame_id
+        self.trace = None
+        self.activation = None
+
+    def __enter__(self):
+        self.trace = self.tracer.start_frame(self.frame_id)
+        if self.trace is not None:
+            self.activation = self.trace.activate()
+            self.activation.__enter__()
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            self.activation.__exit__(*exc_info)
+            self.tracer.finish_frame(self.trace)
+        return False
+
+
+class FrameTracer:
+    def __init__(
+        self,
+        sample_rate: float = 0.01,
+        keep_slower_than: Optional[float] = None,
+        max_frames: int = 100,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the Frame Tracer
+
+        A sample_rate fraction of frames is traced and kept. When
+        keep_slower_than (seconds) is set, every frame is traced and the
+        unsampled ones are also kept when they took at least that long, so
+        outliers are never missed. Only the newest max_frames traces are
+        kept.
+        """
+        self.sample_rate = sample_rate
+        self.keep_slower_than = keep_slower_than
+        self.pid = os.getpid()
+        self._random = random.Random(seed)
+        self._epoch = time.perf_counter()
+        self._lock = threading.Lock()
+        self._traces = deque(maxlen=max_frames)
+        self._frame_count = 0
+
+    def _timestamp(self, seconds):
+        return (seconds - self._epoch) * 1e6
+
+    def start_frame(self, frame_id=None) -> Optional[FrameTrace]:
+        """Begin a frame, returning None when it is not traced"""
+        with self._lock:
+            if frame_id is None:
+                frame_id = self._frame_count
+            self._frame_count += 1
+            sampled = self._random.random() < self.sample_rate
+
+        if not sampled and self.keep_slower_than is None:
+            return None
+        return FrameTrace(self, frame_id, sampled)
+
+    def finish_frame(self, trace: Optional[FrameTrace]) -> None:
+        if trace is None:
+            return
+
+        trace.duration = time.perf_counter() - trace.start
+        if trace.sampled or trace.duration >= self.keep_slower_than:
+            with self._lock:
+                self._traces.append(trace)
+
+    def frame(self, frame_id=None):
+        """Trace a frame processed entirely inside the with block"""
+        return _FrameScope(self, frame_id)
+
+    def traces(self) -> List[FrameTrace]:
+        with self._lock:
+            return list(self._traces)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+    def to_chrome_trace(self) -> dict:
+        events = []
+        thread_names = {}
+        for trace in self.traces():
+            thread_names.update(trace.thread_names)
+            # Frames overlap in a streaming pipeline, so they are async slices
+            frame_event = {
+                "name": f"frame {trace.frame_id}",
+                "cat": "frame",
+                "id": trace.frame_id,
+                "pid": self.pid,
+                "tid": 0,
+            }
+            events.append(
+                dict(
+                    frame_event,
+                    ph="b",
+                    ts=self._timestamp(trace.start),
+                    args={"duration_ms": trace.duration * 1e3},
+                )
+            )
+            events.extend(trace.events)
+            events.append(
+                dict(
+                    frame_event,
+                    ph="e",
+                    ts=self._timestamp(trace.start + trace.duration),
+                )
+            )
+
+        events.extend(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in thread_names.items()
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path) -> int:
+        """Write the kept frames as trace-event JSON, returning their number"""
+        trace = self.to_chrome_trace()
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(trace, file)
+        return sum(event["ph"] == "b" for event in trace["traceEvents"])
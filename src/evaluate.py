@@ -0,0 +1,230 @@
+"""
+Accuracy Evaluation
+Run the pipeline under several configurations over labeled car images and
+report plate and character accuracy next to latency, marking the
+configurations on the accuracy/latency Pareto front.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core.authorization import canonical_plate_key
+from core.pipeline import GateAccessController
+from core.plate_matching import FuzzyPlateIndex
+from core.result_cache import PlateResultCache
+from utils.arabic_plate_translator import ARABIC_TRANSLATION_MAP
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_MODEL = ROOT_DIR / "data" / "models" / "model_svm.npz"
+
+DEFAULT_CONFIGURATIONS = [
+    {"name": "baseline"},
+    {"name": "tracking", "controller": {"track_plates": True}},
+    {"name": "cached", "result_cache": {}},
+]
+
+
+def load_manifest(path):
+    """
+    Read (image path, plate) pairs from a labels manifest
+
+    The manifest is a CSV file with image and plate columns, or a JSON
+    object mapping images to plates. Plates are written in Arabic or as
+    model class names separated by spaces, and image paths are relative to
+    the manifest.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        with open(path, encoding="utf-8") as file:
+            labels = list(json.load(file).items())
+    else:
+        with open(path, encoding="utf-8", newline="") as file:
+            labels = [(row["image"], row["plate"]) for row in csv.DictReader(file)]
+
+    return [(str(path.parent / image), plate) for image, plate in labels]
+
+
+def plate_key(plate, translation_map=ARABIC_TRANSLATION_MAP):
+    """Canonical Arabic key of a plate given in Arabic or as class names"""
+    return canonical_plate_key(
+        "".join(translation_map.get(token, token) for token in plate.split())
+    )
+
+
+def _evaluate_configuration(task):
+    configuration, labels, model_path, sequence = task
+    cv2.setNumThreads(1)
+
+    result_cache = configuration.get("result_cache")
+    controller = GateAccessController(
+        model_path=model_path,
+        translation_map=ARABIC_TRANSLATION_MAP,
+        result_cache=None if result_cache is None else PlateResultCache(**result_cache),
+        **configuration.get("controller", {}),
+    )
+    controller.logger.setLevel(logging.CRITICAL)
+    for attribute, value in configuration.get("detector", {}).items():
+        setattr(controller.detector, attribute, value)
+
+    images = [cv2.imread(image_path) for image_path, _ in labels]
+    edit_distance = FuzzyPlateIndex(confusions={}).distance
+
+    latencies = []
+    plates_correct = chars_correct = chars_total = recognized = 0
+    for image, (image_path, plate) in zip(images, labels):
+        expected = plate_key(plate)
+        if image is None:
+            # An unreadable image counts as a miss
+            chars_total += len(expected)
+            continue
+
+        # Stills are unrelated, no tracked plate or cached crop carries over
+        if not sequence:
+            controller.detector.reset_tracking()
+            if controller.result_cache is not None:
+                controller.result_cache.clear()
+
+        start = time.perf_counter()
+        result = controller.process_image(image)
+        latencies.append(time.perf_counter() - start)
+
+        predicted = ""
+        if result.success:
+            recognized += 1
+            predicted = canonical_plate_key("".join(result.arabic_characters or []))
+
+        plates_correct += predicted == expected
+        chars_correct += max(len(expected) - edit_distance(predicted, expected), 0)
+        chars_total += len(expected)
+
+    latencies = np.array(latencies) * 1e3
+    return {
+        "name": configuration["name"],
+        "configuration": configuration,
+        "images": len(labels),
+        "recognized": recognized / len(labels),
+        "plate_accuracy": plates_correct / len(labels),
+        "char_accuracy": chars_correct / chars_total if chars_total else 0.0,
+        "latency_mean": float(latencies.mean()) if len(latencies) else None,
+        "latency_p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "latency_p95": float(np.percentile(latencies, 95)) if len(latencies) else None,
+    }
+
+
+def pareto_front(results):
+    """Names of the results no other result beats on both accuracy and latency"""
+    front = set()
+    for result in results:
+        dominated = any(
+            other["plate_accuracy"] >= result["plate_accuracy"]
+            and other["latency_p50"] <= result["latency_p50"]
+            and (
+                other["plate_accuracy"] > result["plate_accuracy"]
+                or other["latency_p50"] < result["latency_p50"]
+            )
+            for other in results
+        )
+        if not dominated:
+            front.add(result["name"])
+    return front
+
+
+def evaluate(
+    configurations, labels, model_path=DEFAULT_MODEL, workers=None, sequence=False
+):
+    """
+    Evaluate each configuration in its own process
+
+    Images are processed in manifest order within a configuration. Unless
+    sequence says they are consecutive frames of a video, the images are
+    taken as unrelated stills: the tracked plate and the result cache are
+    reset before each one, so they cannot carry a plate over. Configurations
+    running side by side share the CPU, so compare latencies from runs
+    with the same number of workers.
+    """
+    workers = workers or min(len(configurations), os.cpu_count() or 1)
+    tasks = [
+        (configuration, labels, str(model_path), sequence)
+        for configuration in configurations
+    ]
+
+    if workers == 1:
+        results = [_evaluate_configuration(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes=workers) as pool:
+            results = pool.map(_evaluate_configuration, tasks)
+
+    measured = [result for result in results if result["latency_p50"] is not None]
+    front = pareto_front(measured)
+    for result in results:
+        result["pareto"] = result["name"] in front
+    return sorted(results, key=lambda result: result["latency_p50"] or 0.0)
+
+
+def print_table(results):
+    print(
+        f"{'configuration':<20}{'plate acc':>10}{'char acc':>10}{'read':>8}"
+        f"{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}  pareto"
+    )
+    for result in results:
+        print(
+            f"{result['name']:<20}{result['plate_accuracy']:>10.1%}"
+            f"{result['char_accuracy']:>10.1%}{result['recognized']:>8.1%}"
+            f"{result['latency_mean'] or 0:>10.2f}{result['latency_p50'] or 0:>10.2f}"
+            f"{result['latency_p95'] or 0:>10.2f}  {'*' if result['pareto'] else ''}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare pipeline configurations on accuracy and latency"
+    )
+    parser.add_argument("manifest", help="CSV or JSON labels manifest")
+    parser.add_argument(
+        "--configs",
+        help="JSON list of configurations (name, controller, detector, "
+        "result_cache); defaults to baseline, tracking and cached",
+    )
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="OCR model to load")
+    parser.add_argument(
+        "--workers", type=int, help="Parallel configurations (default: all)"
+    )
+    parser.add_argument(
+        "--sequence",
+        action="store_true",
+        help="The images are consecutive video frames, keep tracking and cache "
+        "state between them",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    labels = load_manifest(args.manifest)
+    configurations = DEFAULT_CONFIGURATIONS
+    if args.configs:
+        with open(args.configs, encoding="utf-8") as file:
+            configurations = json.load(file)
+
+    results = evaluate(
+        configurations, labels, args.model, args.workers, sequence=args.sequence
+    )
+    print(f"{len(labels)} labeled images")
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,18 @@ import logging
 import sys
 
 import cv2
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QFont, QImage, QPalette, QPixmap
-from PyQt6.QtWidgets import (QApplication, QFileDialog, QFrame, QHBoxLayout,
-                             QLabel, QLineEdit, QListWidget, QMainWindow,
-                             QMessageBox, QPushButton, QVBoxLayout, QWidget)
-
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor, QFont, QPalette
+from PyQt6.QtWidgets import (QApplication, QCheckBox, QFileDialog, QFrame,
+                             QHBoxLayout, QHeaderView, QInputDialog, QLabel,
+                             QLineEdit, QMainWindow, QMessageBox, QPushButton,
+                             QTableView, QVBoxLayout, QWidget)
+
+from core.authorization import DEFAULT_PLATES_DB, SQLiteAuthorizationStore
 from core.pipeline import GateAccessController
+from gui.live_view import FrameView, LiveStream
+from gui.plates_model import PlatesListModel
+from gui.recognition import RecognitionWorker
 
 logger = logging.getLogger(__name__)
 
@@ -62,9 +67,25 @@ class GateAccessApp(QMainWindow):
             "ya'": "ي",
         }
 
-        self.controller = GateAccessController(translation_map=arabic_translation_map)
+        self.authorization_store = SQLiteAuthorizationStore(DEFAULT_PLATES_DB)
+        self.controller = GateAccessController(
+            translation_map=arabic_translation_map,
+            authorization_store=self.authorization_store,
+        )
+        # Recognition runs on a thread pool, keeping the window responsive
+        self.recognition = RecognitionWorker(self.controller, parent=self)
+        self.recognition.finished.connect(self.show_result)
+        self.recognition.failed.connect(self.show_error)
+        self.recognition.cancelled.connect(lambda job_id: self.update_status())
+        # Newest job shown, so slower older jobs do not overwrite it
+        self.shown_job = 0
         self.initUI()
 
+        # Pick up edits from other processes, the plates model applies them
+        self.authorization_timer = QTimer(self)
+        self.authorization_timer.timeout.connect(self.authorization_store.poll_changes)
+        self.authorization_timer.start(1000)
+
     def initUI(self):
         self.setWindowTitle("Gate Access Control")
         self.setGeometry(100, 100, 1000, 800)
@@ -130,37 +151,67 @@ class GateAccessApp(QMainWindow):
         input_layout.addLayout(button_layout)
 
         # Authorized plates list
-        list_label = QLabel("Authorized Plates")
-        list_label.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-        list_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        self.plates_list = QListWidget()
+        self.list_label = QLabel("Authorized Plates")
+        self.list_label.setFont(QFont("Arial", 12, QFont.Weight.Bold))
+        self.list_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        search_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search plates")
+        self.search_input.setStyleSheet(self.plate_input.styleSheet())
+        self.prefix_search = QCheckBox("Prefix")
+        self.search_input.textChanged.connect(self.search_plates)
+        self.prefix_search.toggled.connect(self.search_plates)
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.prefix_search)
+
+        # A one-column table with fixed row heights lays out in constant time,
+        # where QListView re-lays out every row on each insert or removal
+        self.plates_model = PlatesListModel(self.authorization_store, parent=self)
+        self.plates_list = QTableView()
+        self.plates_list.setModel(self.plates_model)
+        self.plates_list.setShowGrid(False)
+        self.plates_list.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.plates_list.horizontalHeader().hide()
+        self.plates_list.horizontalHeader().setStretchLastSection(True)
+        rows = self.plates_list.verticalHeader()
+        rows.hide()
+        rows.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        rows.setDefaultSectionSize(self.plates_list.fontMetrics().height() + 12)
         self.plates_list.setStyleSheet(
             """
-            QListWidget {
+            QTableView {
                 background-color: #2a2a2a;
                 border: 2px solid #444;
                 border-radius: 4px;
                 padding: 5px;
             }
-            QListWidget::item {
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #444;
             }
-            QListWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3a3a3a;
             }
         """
         )
+        for signal in (
+            self.plates_model.rowsInserted,
+            self.plates_model.rowsRemoved,
+            self.plates_model.modelReset,
+        ):
+            signal.connect(self.update_plates_count)
 
         left_layout.addWidget(input_frame)
-        left_layout.addWidget(list_label)
+        left_layout.addWidget(self.list_label)
+        left_layout.addLayout(search_layout)
         left_layout.addWidget(self.plates_list)
 
         right_panel = QWidget()
         right_layout = QVBoxLayout(right_panel)
 
-        self.image_label = QLabel()
+        # Shows loaded images and the live camera feed
+        self.image_label = FrameView()
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.image_label.setMinimumSize(600, 400)
         self.image_label.setStyleSheet(
@@ -177,8 +228,10 @@ class GateAccessApp(QMainWindow):
         button_layout = QHBoxLayout()
         load_button = QPushButton("Load Image")
         process_button = QPushButton("Process Image")
+        cancel_button = QPushButton("Cancel")
+        self.camera_button = QPushButton("Start Camera")
 
-        for button in [load_button, process_button]:
+        for button in [load_button, process_button, cancel_button, self.camera_button]:
             button.setStyleSheet(
                 """
                 QPushButton {
@@ -199,8 +252,12 @@ class GateAccessApp(QMainWindow):
 
         load_button.clicked.connect(self.load_image)
         process_button.clicked.connect(self.process_image)
+        cancel_button.clicked.connect(self.cancel_processing)
         button_layout.addWidget(load_button)
         button_layout.addWidget(process_button)
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(self.camera_button)
+        self.camera_button.clicked.connect(self.toggle_camera)
 
         # Results display
         self.result_label = QLabel("Results will appear here")
@@ -217,7 +274,7 @@ class GateAccessApp(QMainWindow):
         )
         self.result_label.setMinimumHeight(100)
 
-        self.result_image = QLabel()
+        self.result_image = FrameView()
         self.result_image.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.result_image.setMinimumSize(600, 400)
         self.result_image.setStyleSheet(
@@ -240,12 +297,25 @@ class GateAccessApp(QMainWindow):
         main_layout.addWidget(right_panel)
 
         self.current_image = None
-        self.update_plates_list()
+        self.update_plates_count()
+
+        # Frames are shown as captured, recognition keeps up as it can
+        self.live_stream = LiveStream(self.controller, self.image_label, parent=self)
+        self.live_stream.result.connect(self.show_stream_result)
+        self.live_stream.stopped.connect(self.camera_stopped)
 
-    def update_plates_list(self):
-        self.plates_list.clear()
-        for plate in sorted(self.controller.authorized_plates):
-            self.plates_list.addItem(plate[::-1])
+    def search_plates(self):
+        self.plates_model.set_filter(
+            self.search_input.text().strip(), prefix=self.prefix_search.isChecked()
+        )
+
+    def update_plates_count(self):
+        shown, total = self.plates_model.rowCount(), self.plates_model.total
+        self.list_label.setText(
+            f"Authorized Plates ({total})"
+            if shown == total
+            else f"Authorized Plates ({shown} of {total})"
+        )
 
     def add_plate(self):
         plate = self.plate_input.text().strip()
@@ -259,7 +329,6 @@ class GateAccessApp(QMainWindow):
                 self, "Success", f"Plate {plate} added to authorized list"
             )
             self.plate_input.clear()
-            self.update_plates_list()
         else:
             QMessageBox.warning(self, "Error", "Please enter a plate number")
 
@@ -271,7 +340,6 @@ class GateAccessApp(QMainWindow):
                 self, "Success", f"Plate {plate} removed from authorized list"
             )
             self.plate_input.clear()
-            self.update_plates_list()
         else:
             QMessageBox.warning(self, "Error", "Please enter a plate number")
 
@@ -283,21 +351,7 @@ class GateAccessApp(QMainWindow):
         if file_name:
             self.current_image = cv2.imread(file_name)
             if self.current_image is not None:
-                rgb_image = cv2.cvtColor(self.current_image, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_image.shape
-                bytes_per_line = ch * w
-
-                qt_image = QImage(
-                    rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888
-                )
-                pixmap = QPixmap.fromImage(qt_image)
-                scaled_pixmap = pixmap.scaled(
-                    self.image_label.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
-
-                self.image_label.setPixmap(scaled_pixmap)
+                self.image_label.show_frame(self.current_image)
                 self.result_label.setText(
                     'Image loaded. Click "Process Image" to analyze.'
                 )
@@ -309,48 +363,89 @@ class GateAccessApp(QMainWindow):
             QMessageBox.warning(self, "Error", "Please load an image first")
             return
 
-        result = self.controller.process_image(self.current_image)
+        self.recognition.submit(self.current_image)
+        self.update_status()
+
+    def cancel_processing(self):
+        self.recognition.cancel_all()
+        self.update_status()
+
+    def update_status(self):
+        in_flight = len(self.recognition)
+        self.statusBar().showMessage(
+            f"Processing {in_flight} image{'s' if in_flight != 1 else ''}"
+            if in_flight
+            else "Ready"
+        )
+
+    def show_error(self, job_id, message):
+        self.update_status()
+        if job_id < self.shown_job:
+            return
+        self.shown_job = job_id
+        self.result_label.setText(f"<p style='color: #F44336;'>Error: {message}</p>")
+
+    def show_result(self, job_id, result):
+        self.update_status()
+        if job_id < self.shown_job:
+            return
+        self.shown_job = job_id
 
         if result.success:
             plate_text = " ".join(result.arabic_characters)
-            is_authorized = self.controller.verify_access(plate_text)
+            self.display_result(result, self.controller.verify_access(plate_text))
+        else:
+            self.result_label.setText(
+                f"<p style='color: #F44336;'>Error: {result.error_message}</p>"
+            )
 
-            status = "AUTHORIZED" if is_authorized else "UNAUTHORIZED"
-            status_color = "#4CAF50" if is_authorized else "#F44336"  # Green or Red
+    def show_stream_result(self, stream_result):
+        # Only decided vehicles replace the last result
+        if stream_result.plate_text is None or not stream_result.result.success:
+            return
+        self.display_result(stream_result.result, stream_result.access_granted)
 
-            result_text = f"""
-            <div style='font-size: 14px;'>
-                <p><b>Detected Plate:</b> {result.characters}</p>
-                <p><b>Status:</b> <span style='color: {status_color};'>{status}</span></p>
-            """
-            if result.arabic_characters:
-                arabic_text = " ".join(result.arabic_characters)
-                result_text += f"<p><b>Arabic:</b> {arabic_text[::-1]}</p>"
+    def display_result(self, result, is_authorized):
+        status = "AUTHORIZED" if is_authorized else "UNAUTHORIZED"
+        status_color = "#4CAF50" if is_authorized else "#F44336"  # Green or Red
 
-            result_text += "</div>"
+        result_text = f"""
+        <div style='font-size: 14px;'>
+            <p><b>Detected Plate:</b> {result.characters}</p>
+            <p><b>Status:</b> <span style='color: {status_color};'>{status}</span></p>
+        """
+        if result.arabic_characters:
+            arabic_text = " ".join(result.arabic_characters)
+            result_text += f"<p><b>Arabic:</b> {arabic_text[::-1]}</p>"
 
-            self.result_label.setText(result_text)
+        result_text += "</div>"
 
+        self.result_label.setText(result_text)
 
-            if result.plate_image is not None:
-                rgb_image = cv2.cvtColor(result.plate_image, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_image.shape
-                bytes_per_line = ch * w
+        if result.plate_image is not None:
+            self.result_image.show_frame(result.plate_image)
 
-                qt_image = QImage(
-                    rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888
-                )
-                pixmap = QPixmap.fromImage(qt_image)
-                scaled_pixmap = pixmap.scaled(
-                    self.result_image.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
-                self.result_image.setPixmap(scaled_pixmap)
-        else:
-            self.result_label.setText(
-                f"<p style='color: #F44336;'>Error: {result.error_message}</p>"
-            )
+    def toggle_camera(self):
+        if self.live_stream.running:
+            self.live_stream.stop()
+            return
+
+        source, ok = QInputDialog.getText(
+            self, "Live Camera", "Camera index, stream URL or video file:", text="0"
+        )
+        if not ok or not source.strip():
+            return
+        self.live_stream.start(source.strip())
+        self.camera_button.setText("Stop Camera")
+
+    def camera_stopped(self):
+        self.camera_button.setText("Start Camera")
+        self.statusBar().showMessage("Camera stopped")
+
+    def closeEvent(self, event):
+        self.live_stream.stop(timeout=2)
+        self.recognition.shutdown()
+        super().closeEvent(event)
 
 
 def main():
@@ -0,0 +1,214 @@
+"""
+Live View
+Show camera frames in the GUI at the display rate. Frames are downscaled
+to the widget first and only then converted to Qt's native 32-bit layout,
+into reused buffers, and a stream's frames are shown independently of how
+fast they are recognized.
+"""
+
+import threading
+import time
+from typing import Any, Optional
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QGuiApplication, QImage, QPainter
+from PyQt6.QtWidgets import QLabel, QWidget
+
+from core.pipeline import GateAccessController
+from core.plate_voting import PlateVoter
+from core.streaming import StreamingPipeline
+
+
+class FrameView(QLabel):
+    """
+    Label showing the latest BGR or grayscale frame, fitted to its size
+
+    show_frame may be called from any thread and only keeps the frame. A
+    timer running at fps, by default the screen refresh rate, renders the
+    newest frame when there is one, so a fast source never repaints more
+    often than the display can show.
+    """
+
+    def __init__(self, fps: Optional[float] = None, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        if fps is None:
+            screen = QGuiApplication.primaryScreen()
+            fps = screen.refreshRate() if screen is not None else 0
+        self.fps = fps or 60.0
+
+        self._frame = None
+        self._frame_id = 0
+        self._rendered_id = 0
+        self._scaled = None
+        self._buffer = None
+        self._image = None
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._render)
+        self._timer.start(max(int(1000 / self.fps), 1))
+
+    def show_frame(self, frame: np.ndarray) -> None:
+        self._frame = frame
+        self._frame_id += 1
+
+    def clear(self) -> None:
+        self._frame = None
+        self._frame_id += 1
+
+    def _render(self):
+        frame_id = self._frame_id
+        if frame_id == self._rendered_id:
+            return
+        self._rendered_id = frame_id
+
+        frame = self._frame
+        if frame is None:
+            self._image = None
+            self.update()
+            return
+
+        height, width = frame.shape[:2]
+        area = self.contentsRect()
+        scale = min(area.width() / width, area.height() / height)
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+
+        shape = (size[1], size[0])
+        if self._buffer is None or self._buffer.shape[:2] != shape:
+            self._buffer = np.empty(shape + (4,), dtype=np.uint8)
+        if self._scaled is None or self._scaled.shape != shape + frame.shape[2:]:
+            self._scaled = np.empty(shape + frame.shape[2:], dtype=np.uint8)
+
+        # Bilinear keeps up with 4K frames, INTER_AREA takes tens of ms there
+        cv2.resize(frame, size, dst=self._scaled, interpolation=cv2.INTER_LINEAR)
+        # BGRA bytes are QImage's RGB32, which is drawn without conversion
+        cv2.cvtColor(
+            self._scaled,
+            cv2.COLOR_BGR2BGRA if self._scaled.ndim == 3 else cv2.COLOR_GRAY2BGRA,
+            dst=self._buffer,
+        )
+
+        # The image wraps the buffer, which is only rewritten on this thread
+        self._image = QImage(
+            self._buffer.data,
+            size[0],
+            size[1],
+            self._buffer.strides[0],
+            QImage.Format.Format_RGB32,
+        )
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._image is None:
+            return
+
+        target = self._image.rect()
+        target.moveCenter(self.contentsRect().center())
+        painter = QPainter(self)
+        painter.drawImage(target.topLeft(), self._image)
+        painter.end()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Fit the current frame to the new size on the next tick
+        self._rendered_id = None
+
+
+class PacedCapture:
+    """Video file read at its own frame rate, as a camera would deliver it"""
+
+    def __init__(self, path: str):
+        self.capture = cv2.VideoCapture(path)
+        fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.interval = 1 / fps if fps and fps > 0 else 1 / 30
+        self._due = None
+
+    def isOpened(self) -> bool:
+        return self.capture.isOpened()
+
+    def read(self):
+        ret, frame = self.capture.read()
+        now = time.monotonic()
+        if self._due is None:
+            self._due = now
+        elif self._due > now:
+            time.sleep(self._due - now)
+        self._due = max(self._due, now) + self.interval
+        return ret, frame
+
+    def release(self) -> None:
+        self.capture.release()
+
+
+class LiveStream(QObject):
+    """
+    StreamingPipeline feeding a FrameView, with results as Qt signals
+
+    Every captured frame goes to the view, while the pipeline recognizes
+    the freshest frames it can keep up with. result carries each
+    StreamResult and stopped is emitted when the stream ends, both on the
+    thread that created the stream.
+    """
+
+    result = pyqtSignal(object)
+    stopped = pyqtSignal()
+
+    def __init__(
+        self,
+        controller: GateAccessController,
+        view: FrameView,
+        parent: Optional[QObject] = None,
+        **pipeline_options,
+    ):
+        super().__init__(parent)
+        self.controller = controller
+        self.view = view
+        self.pipeline_options = pipeline_options
+        self.pipeline = None
+        self._capture = None
+        self._watcher = None
+
+    @property
+    def running(self) -> bool:
+        return self._watcher is not None and self._watcher.is_alive()
+
+    def start(self, source: Any) -> None:
+        """Stream a camera index, stream URL or video file"""
+        if self.running:
+            raise RuntimeError("The stream is already running")
+
+        if isinstance(source, str) and not source.isdigit() and "://" not in source:
+            # A file would otherwise be read as fast as it decodes
+            self._capture = source = PacedCapture(source)
+        elif isinstance(source, str) and source.isdigit():
+            source = int(source)
+
+        options = {"voter": PlateVoter(), **self.pipeline_options}
+        self.pipeline = StreamingPipeline(
+            self.controller,
+            source,
+            on_result=self.result.emit,
+            on_frame=self.view.show_frame,
+            **options,
+        )
+        self.pipeline.start()
+        self._watcher = threading.Thread(
+            target=self._wait, name="live-stream", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self, timeout: float = 0) -> None:
+        """Stop capturing, waiting up to timeout seconds for the stream to end"""
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+
+    def _wait(self):
+        self.pipeline.join()
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+        self.stopped.emit()
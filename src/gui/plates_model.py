@@ -0,0 +1,171 @@
+"""
+Plates Model
+List model over the authorized plates of an AuthorizationStore. The model
+keeps the plates sorted and applies the store's change notifications as
+row insertions and removals, so a view stays responsive with hundreds of
+thousands of plates, and filters them for an instant search box.
+"""
+
+import bisect
+from typing import List, Optional
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt, pyqtSignal
+
+from core.authorization import ADDED, AuthorizationStore, Change
+
+
+class PlatesListModel(QAbstractListModel):
+    """
+    Authorized plates sorted by their stored text, displayed reversed
+
+    The plates are sorted once when loaded and kept sorted by bisection.
+    The GUI shows plates reversed, the way they are typed, so searches
+    match that displayed text: a substring anywhere, or a prefix. Changes
+    are applied one row at a time, except batches larger than
+    reset_threshold, which reset the model.
+    """
+
+    PlateRole = Qt.ItemDataRole.UserRole
+
+    # Carries store notifications, which may come from other threads
+    _changes_received = pyqtSignal(object)
+
+    def __init__(
+        self,
+        store: AuthorizationStore,
+        reset_threshold: int = 1000,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.store = store
+        self.reset_threshold = reset_threshold
+
+        self._plates: List[str] = []
+        self._query = ""
+        self._prefix = False
+        # Rows shown, all the plates unless a search is active
+        self._rows: List[str] = self._plates
+
+        self._changes_received.connect(self.apply_changes)
+        self.store.add_listener(self._changes_received.emit)
+        self.reload()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        plate = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return plate[::-1]
+        if role == self.PlateRole:
+            return plate
+        return None
+
+    def plate(self, row: int) -> str:
+        return self._rows[row]
+
+    @property
+    def total(self) -> int:
+        """Number of plates, whether or not they match the search"""
+        return len(self._plates)
+
+    def reload(self) -> None:
+        """Read every plate from the store again"""
+        self.beginResetModel()
+        self._plates = sorted(self.store)
+        self._rows = self._filter(self._plates)
+        self.endResetModel()
+
+    def set_filter(self, text: str, prefix: bool = False) -> None:
+        """Show the plates whose displayed text contains, or starts with, text"""
+        if (text, prefix) == (self._query, self._prefix):
+            return
+
+        # A longer query only narrows the plates already shown
+        narrowing = (
+            self._query
+            and prefix == self._prefix
+            and (text.startswith(self._query) if prefix else self._query in text)
+        )
+        candidates = self._rows if narrowing else self._plates
+
+        self.beginResetModel()
+        self._query, self._prefix = text, prefix
+        self._rows = self._filter(candidates)
+        self.endResetModel()
+
+    def _matches(self, plate: str) -> bool:
+        # Reversing the query matches the displayed text without reversing plates
+        query = self._query[::-1]
+        return plate.endswith(query) if self._prefix else query in plate
+
+    def _filter(self, plates: List[str]) -> List[str]:
+        if not self._query:
+            return self._plates
+
+        # A scan stays within a frame at 100k plates, an index of the
+        # displayed text takes ~100 ms to sort
+        query = self._query[::-1]
+        if self._prefix:
+            # Slicing is about twice as fast as endswith on Arabic text
+            start = -len(query)
+            return [plate for plate in plates if plate[start:] == query]
+        return [plate for plate in plates if query in plate]
+
+    def apply_changes(self, changes: List[Change]) -> None:
+        """Apply (action, plate) changes reported by the store"""
+        if len(changes) > self.reset_threshold:
+            plates = set(self._plates)
+            for action, plate in changes:
+                if action == ADDED:
+                    plates.add(plate)
+                else:
+                    plates.discard(plate)
+
+            self.beginResetModel()
+            self._plates = sorted(plates)
+            self._rows = self._filter(self._plates)
+            self.endResetModel()
+            return
+
+        for action, plate in changes:
+            if action == ADDED:
+                self._insert(plate)
+            else:
+                self._remove(plate)
+
+    def _insert(self, plate: str) -> None:
+        position = bisect.bisect_left(self._plates, plate)
+        if position < len(self._plates) and self._plates[position] == plate:
+            return
+
+        if self._rows is self._plates:
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._plates.insert(position, plate)
+            self.endInsertRows()
+        else:
+            self._plates.insert(position, plate)
+            if self._matches(plate):
+                row = bisect.bisect_left(self._rows, plate)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._rows.insert(row, plate)
+                self.endInsertRows()
+
+    def _remove(self, plate: str) -> None:
+        position = bisect.bisect_left(self._plates, plate)
+        if position == len(self._plates) or self._plates[position] != plate:
+            return
+
+        if self._rows is self._plates:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self._plates[position]
+            self.endRemoveRows()
+        else:
+            del self._plates[position]
+            row = bisect.bisect_left(self._rows, plate)
+            if row < len(self._rows) and self._rows[row] == plate:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
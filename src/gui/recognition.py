@@ -0,0 +1,156 @@
+"""
+Background Recognition
+Run plate recognition on a QThreadPool, so the Qt event thread only queues
+images and displays results. Jobs can be cancelled while queued, and
+several images are recognized at once, one per pool thread.
+"""
+
+import itertools
+import threading
+from typing import Optional
+
+import numpy as np
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from core.pipeline import GateAccessController
+
+
+class _RecognitionJob(QRunnable):
+    def __init__(self, job_id: int, image: np.ndarray, worker: "RecognitionWorker"):
+        super().__init__()
+        # The worker keeps the job alive until it has reported back
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.image = image
+        self.worker = worker
+        self.cancelled = threading.Event()
+        self.started = False
+
+    def run(self):
+        self.started = True
+        if self.cancelled.is_set():
+            self.worker._finish(self, None, None)
+            return
+        try:
+            result = self.worker._thread_controller().process_image(self.image)
+        except Exception as e:
+            self.worker._finish(self, None, e)
+        else:
+            self.worker._finish(self, result, None)
+
+
+class RecognitionWorker(QObject):
+    """
+    Recognize images on a thread pool and report back through signals
+
+    Signals are delivered on the thread that created the worker, normally
+    the GUI thread. The enhancer and extractor keep per-image state, so
+    each pool thread recognizes with its own controller, sharing the
+    model of the given one. Access is left to the caller, on its own
+    thread.
+    """
+
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+    def __init__(
+        self,
+        controller: GateAccessController,
+        max_threads: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        parent: Optional[QObject] = None,
+    ):
+        """
+        Initialize the Recognition Worker
+
+        max_threads defaults to QThreadPool's ideal thread count. When more
+        than max_pending jobs are waiting, the oldest waiting job is
+        cancelled, so results stay fresh under load.
+        """
+        super().__init__(parent)
+        self.controller = controller
+        self.max_pending = max_pending
+        self.pool = QThreadPool(self)
+        if max_threads is not None:
+            self.pool.setMaxThreadCount(max_threads)
+
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __len__(self):
+        """Jobs queued or running"""
+        with self._lock:
+            return len(self._jobs)
+
+    def submit(self, image: np.ndarray) -> int:
+        """Queue an image for recognition; returns its job id"""
+        job = _RecognitionJob(next(self._ids), image, self)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            waiting = [
+                job_id for job_id, queued in self._jobs.items() if not queued.started
+            ]
+
+        if self.max_pending is not None:
+            # Job ids increase, so the oldest waiting jobs come first
+            for job_id in waiting[: max(len(waiting) - self.max_pending, 0)]:
+                self.cancel(job_id)
+
+        self.pool.start(job)
+        return job.job_id
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a job; returns False when it already finished
+
+        A queued job is dropped right away. A running job completes, but
+        its result is discarded and cancelled is emitted instead.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return False
+
+        job.cancelled.set()
+        if self.pool.tryTake(job):
+            self._finish(job, None, None)
+        return True
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def shutdown(self, timeout_ms: int = -1) -> bool:
+        """Cancel every job and wait for the running ones to return"""
+        self.cancel_all()
+        return self.pool.waitForDone(timeout_ms)
+
+    def _thread_controller(self) -> GateAccessController:
+        controller = getattr(self._local, "controller", None)
+        if controller is None:
+            controller = GateAccessController(
+                model_path=self.controller.model_path,
+                translation_map=self.controller.translator.translation_map,
+                model=self.controller.model,
+            )
+            self._local.controller = controller
+        # Follow hot-swaps of the main controller's model
+        controller.model = self.controller.model
+        return controller
+
+    def _finish(self, job, result, error):
+        with self._lock:
+            if self._jobs.pop(job.job_id, None) is None:
+                return
+
+        if job.cancelled.is_set():
+            self.cancelled.emit(job.job_id)
+        elif error is not None:
+            self.failed.emit(job.job_id, str(error))
+        else:
+            self.finished.emit(job.job_id, result)
@@ -0,0 +1,59 @@
+"""
+Model Export
+Compile a trained linear SVC into the NumPy artifact loaded by
+LinearOvOClassifier. Exporting needs scikit-learn; loading the artifact
+does not.
+"""
+
+import argparse
+
+import numpy as np
+from joblib import load
+
+from ml.linear_svc import LinearOvOClassifier
+
+
+def compile_linear_svc(model):
+    """Build a LinearOvOClassifier from a fitted SVC(kernel="linear")"""
+    if getattr(model, "kernel", None) != "linear":
+        raise ValueError("Only SVC models with a linear kernel can be compiled")
+
+    return LinearOvOClassifier(
+        weights=model.coef_,
+        intercepts=model.intercept_,
+        classes=np.asarray(model.classes_, dtype=str),
+    )
+
+
+def export_linear_svc(model_path, output_path, validation_features=None):
+    """Compile the pickled SVC at model_path and save it to output_path"""
+    model = load(model_path)
+    classifier = compile_linear_svc(model)
+
+    if validation_features is not None:
+        expected = np.asarray(model.predict(validation_features), dtype=str)
+        predicted = classifier.predict(validation_features)
+        if not np.array_equal(expected, predicted):
+            raise ValueError("Compiled classifier disagrees with SVC.predict")
+
+    classifier.save(output_path)
+    return classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a linear SVC pickle into a NumPy .npz artifact"
+    )
+    parser.add_argument("model_path", help="Path to the pickled SVC")
+    parser.add_argument("output_path", help="Path of the .npz artifact to write")
+    args = parser.parse_args()
+
+    classifier = export_linear_svc(args.model_path, args.output_path)
+    print(
+        f"Exported {len(classifier.first_class)} pairwise classifiers over "
+        f"{len(classifier.classes_)} classes to {args.output_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
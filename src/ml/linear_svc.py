@@ -0,0 +1,153 @@
+"""
+Linear SVC Runtime
+Predict with a linear one-vs-one SVC compiled to plain NumPy arrays, so
+recognition only needs NumPy to load and run the OCR model. The arrays can
+be published in shared memory, so worker processes map one read-only copy.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SharedClassifierHandle:
+    """Picklable description of a classifier published in shared memory"""
+
+    name: str
+    n_pairs: int
+    n_features: int
+    classes: Tuple[str, ...]
+
+
+class LinearOvOClassifier:
+    """
+    One-vs-one linear classifier evaluated as a single matrix multiply
+
+    weights holds one row per class pair in libsvm order
+    ((0, 1), (0, 2), ..., (k - 2, k - 1)). A positive decision value is a
+    vote for the first class of the pair, and ties in the vote go to the
+    lowest class index, as in libsvm.
+    """
+
+    def __init__(self, weights, intercepts, classes):
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.intercepts = np.ascontiguousarray(intercepts, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+
+        n_classes = len(self.classes_)
+        self.first_class, self.second_class = np.triu_indices(n_classes, 1)
+
+        if self.weights.shape[0] != len(self.first_class):
+            raise ValueError(
+                f"Expected {len(self.first_class)} pairwise classifiers for "
+                f"{n_classes} classes, got {self.weights.shape[0]}"
+            )
+
+    @property
+    def n_features_in_(self):
+        return self.weights.shape[1]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(Path(path), allow_pickle=False) as artifact:
+            return cls(
+                weights=artifact["weights"],
+                intercepts=artifact["intercepts"],
+                classes=artifact["classes"],
+            )
+
+    def save(self, path):
+        np.savez(
+            Path(path),
+            weights=self.weights,
+            intercepts=self.intercepts,
+            classes=self.classes_,
+        )
+
+    def share(self) -> "SharedClassifier":
+        """Publish the weights in a shared memory block owned by the caller"""
+        return SharedClassifier(self)
+
+    @classmethod
+    def attach(cls, handle: SharedClassifierHandle) -> "LinearOvOClassifier":
+        """Classifier over read-only views of a published block, without copying"""
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(name=handle.name)
+        weights, intercepts = _shared_arrays(block, handle.n_pairs, handle.n_features)
+        weights.flags.writeable = False
+        intercepts.flags.writeable = False
+
+        classifier = cls(weights, intercepts, np.asarray(handle.classes))
+        # The views are only valid while the block stays mapped
+        classifier._shared_memory = block
+        return classifier
+
+    def decision_function(self, features):
+        features = np.asarray(features, dtype=np.float64)
+        return features @ self.weights.T + self.intercepts
+
+    def predict(self, features):
+        decisions = self.decision_function(features)
+        n_samples, n_classes = decisions.shape[0], len(self.classes_)
+
+        winners = np.where(decisions > 0, self.first_class, self.second_class)
+        offsets = np.arange(n_samples)[:, None] * n_classes
+        votes = np.bincount(
+            (winners + offsets).ravel(), minlength=n_samples * n_classes
+        ).reshape(n_samples, n_classes)
+
+        return self.classes_[np.argmax(votes, axis=1)]
+
+
+def _shared_arrays(block, n_pairs, n_features):
+    weights = np.ndarray((n_pairs, n_features), dtype=np.float64, buffer=block.buf)
+    intercepts = np.ndarray(
+        (n_pairs,), dtype=np.float64, buffer=block.buf, offset=weights.nbytes
+    )
+    return weights, intercepts
+
+
+class SharedClassifier:
+    """
+    Shared memory block holding a classifier's weights and intercepts
+
+    The creating process owns the block: workers attach with
+    LinearOvOClassifier.attach(handle), and close() frees it once they are
+    done.
+    """
+
+    def __init__(self, classifier: LinearOvOClassifier):
+        from multiprocessing import shared_memory
+
+        n_pairs, n_features = classifier.weights.shape
+        self._block = shared_memory.SharedMemory(
+            create=True,
+            size=classifier.weights.nbytes + classifier.intercepts.nbytes,
+        )
+        weights, intercepts = _shared_arrays(self._block, n_pairs, n_features)
+        weights[:] = classifier.weights
+        intercepts[:] = classifier.intercepts
+
+        self.handle = SharedClassifierHandle(
+            name=self._block.name,
+            n_pairs=n_pairs,
+            n_features=n_features,
+            classes=tuple(str(label) for label in classifier.classes_),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
@@ -0,0 +1,184 @@
+"""
+Model Registry
+Directory of versioned OCR model artifacts. Versions are written as
+<name>-v<N>.npz with their metrics in <name>-v<N>.json, and the active
+version is copied to <name>.npz, the path the pipeline loads by default.
+Every activation is recorded, so the registry can roll back.
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+class ModelValidationError(ValueError):
+    """Raised when a candidate model fails validation"""
+
+
+def validate_model(
+    model, expected_features, features=None, labels=None, min_accuracy=0.9
+) -> Optional[float]:
+    """
+    Check a candidate model before it serves traffic
+
+    The model must take expected_features features. When a labeled
+    warm-up set is given, predicting it also warms the model up, and the
+    accuracy on it must reach min_accuracy. Returns that accuracy, or None
+    without a labeled set.
+    """
+    n_features = getattr(model, "n_features_in_", expected_features)
+    if n_features != expected_features:
+        raise ModelValidationError(
+            f"Model expects {n_features} features, the pipeline produces "
+            f"{expected_features}"
+        )
+
+    if features is None or len(features) == 0:
+        return None
+
+    predicted = np.asarray(model.predict(features), dtype=str)
+    if labels is None:
+        return None
+
+    accuracy = float(np.mean(predicted == np.asarray(labels, dtype=str)))
+    if accuracy < min_accuracy:
+        raise ModelValidationError(
+            f"Warm-up accuracy {accuracy:.3f} is below {min_accuracy:.3f}"
+        )
+    return accuracy
+
+
+class ModelRegistry:
+    def __init__(self, directory, name: str = "model_svm"):
+        """Initialize the Model Registry over directory"""
+        self.directory = Path(directory)
+        self.name = name
+        self._pattern = re.compile(rf"{re.escape(name)}-v(\d+)\.npz$")
+        self._lock = threading.Lock()
+
+    @property
+    def active_path(self) -> Path:
+        return self.directory / f"{self.name}.npz"
+
+    @property
+    def _active_metadata_path(self) -> Path:
+        return self.directory / f"{self.name}.json"
+
+    @property
+    def _history_path(self) -> Path:
+        return self.directory / f"{self.name}.history.json"
+
+    def path(self, version: int) -> Path:
+        return self.directory / f"{self.name}-v{version}.npz"
+
+    def metadata_path(self, version: int) -> Path:
+        return self.path(version).with_suffix(".json")
+
+    def warmup_path(self, version: int) -> Path:
+        return self.path(version).with_suffix(".warmup.npz")
+
+    def versions(self) -> List[int]:
+        if not self.directory.exists():
+            return []
+        return sorted(
+            int(match.group(1))
+            for path in self.directory.glob(f"{self.name}-v*.npz")
+            if (match := self._pattern.match(path.name))
+        )
+
+    def latest_version(self) -> Optional[int]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def next_version(self) -> int:
+        return (self.latest_version() or 0) + 1
+
+    def metadata(self, version: int) -> dict:
+        path = self.metadata_path(version)
+        if not path.exists():
+            return {}
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def warmup_set(self, version: int):
+        """(features, labels) stored with a version, or (None, None)"""
+        path = self.warmup_path(version)
+        if not path.exists():
+            return None, None
+        with np.load(path, allow_pickle=False) as warmup:
+            return warmup["features"], warmup["labels"]
+
+    def publish(self, classifier, metadata: dict, warmup=None) -> int:
+        """Save a classifier as the next version, with an optional warm-up set"""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            version = self.next_version()
+            classifier.save(self.path(version))
+
+            metadata = dict(metadata, version=version, artifact=self.path(version).name)
+            _write_json(self.metadata_path(version), metadata)
+
+            if warmup is not None:
+                features, labels = warmup
+                np.savez(
+                    self.warmup_path(version),
+                    features=features,
+                    labels=np.asarray(labels, dtype=str),
+                )
+            return version
+
+    def active_version(self) -> Optional[int]:
+        if not self._active_metadata_path.exists():
+            return None
+        with open(self._active_metadata_path, encoding="utf-8") as file:
+            return json.load(file).get("version")
+
+    def history(self) -> List[int]:
+        if not self._history_path.exists():
+            return []
+        with open(self._history_path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def activate(self, version: int) -> Path:
+        """Make version the active model, replacing <name>.npz atomically"""
+        with self._lock:
+            self._activate(version)
+            _write_json(self._history_path, self.history() + [version])
+        return self.active_path
+
+    def rollback(self) -> Optional[int]:
+        """Re-activate the version active before the current one"""
+        with self._lock:
+            history = self.history()
+            if len(history) < 2:
+                return None
+            history.pop()
+            self._activate(history[-1])
+            _write_json(self._history_path, history)
+            return history[-1]
+
+    def _activate(self, version):
+        source = self.path(version)
+        if not source.exists():
+            raise FileNotFoundError(f"No model version {version} in {self.directory}")
+
+        temporary = self.active_path.with_suffix(".tmp.npz")
+        shutil.copyfile(source, temporary)
+        os.replace(temporary, self.active_path)
+        _write_json(
+            self._active_metadata_path,
+            dict(self.metadata(version), version=version),
+        )
+
+
+def _write_json(path, data):
+    temporary = Path(path).with_suffix(".tmp")
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+    os.replace(temporary, path)
@@ -0,0 +1,281 @@
+"""
+OCR Training
+Train the character classifier from dataset/<class>/*.jpg. HOG features
+are extracted in parallel and kept in a content-addressed, memory-mapped
+cache, so retraining only computes features for new or changed images.
+Each run writes a versioned NumPy model artifact and its metrics.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ml.export_model import compile_linear_svc
+from ml.registry import ModelRegistry
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+# Must match the feature extraction of GateAccessController
+HOG_PARAMS = {"orientations": 9, "pixels_per_cell": [8, 8], "char_dims": [32, 64]}
+
+
+def scan_dataset(dataset_dir):
+    """(path, label) pairs for every image, labelled by its class folder"""
+    return [
+        (path, class_dir.name)
+        for class_dir in sorted(Path(dataset_dir).iterdir())
+        if class_dir.is_dir()
+        for path in sorted(class_dir.iterdir())
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    ]
+
+
+def _hash_file(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _extract_features(paths):
+    import cv2
+
+    from utils.hog_features import batch_hog, prepare_char_batch
+
+    cv2.setNumThreads(1)
+    images = []
+    for path in paths:
+        image = cv2.imread(str(path))
+        if image is None:
+            raise ValueError(f"Could not read training image: {path}")
+        images.append(image)
+
+    gray = prepare_char_batch(images, tuple(HOG_PARAMS["char_dims"]))
+    return batch_hog(
+        gray,
+        orientations=HOG_PARAMS["orientations"],
+        pixels_per_cell=tuple(HOG_PARAMS["pixels_per_cell"]),
+    )
+
+
+class FeatureCache:
+    """
+    HOG features keyed by the SHA-256 of the image file
+
+    Features live in features.npy, opened memory-mapped, with their row
+    per key in keys.json. The cache is dropped when the HOG parameters
+    change.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.features_path = self.cache_dir / "features.npy"
+        self.keys_path = self.cache_dir / "keys.json"
+
+        self.rows = {}
+        self.features = None
+        if self.keys_path.exists() and self.features_path.exists():
+            with open(self.keys_path, encoding="utf-8") as file:
+                index = json.load(file)
+            if index.get("params") == HOG_PARAMS:
+                self.rows = index["rows"]
+                self.features = np.load(self.features_path, mmap_mode="r")
+
+    def lookup(self, keys, paths, workers=None, chunksize=32):
+        """
+        Features for each key, extracting only the missing ones
+
+        Returns the feature matrix and how many images were extracted.
+        The cache is rewritten to hold exactly the given keys.
+        """
+        missing = sorted({key for key in keys if key not in self.rows})
+        paths_by_key = dict(zip(keys, paths))
+        new_features = {}
+
+        if missing:
+            missing_paths = [paths_by_key[key] for key in missing]
+            chunks = [
+                missing_paths[i : i + chunksize]
+                for i in range(0, len(missing_paths), chunksize)
+            ]
+            workers = min(workers or os.cpu_count() or 1, len(chunks))
+            if workers == 1:
+                results = [_extract_features(chunk) for chunk in chunks]
+            else:
+                with multiprocessing.Pool(processes=workers) as pool:
+                    results = pool.map(_extract_features, chunks)
+            new_features = dict(zip(missing, np.concatenate(results)))
+
+        features = np.stack(
+            [
+                (
+                    new_features[key]
+                    if key in new_features
+                    else self.features[self.rows[key]]
+                )
+                for key in keys
+            ]
+        )
+
+        unique_keys = list(dict.fromkeys(keys))
+        if missing or set(unique_keys) != set(self.rows):
+            self._write(unique_keys, features, keys)
+        return features, len(missing)
+
+    def _write(self, unique_keys, features, keys):
+        first_row = {}
+        for row, key in enumerate(keys):
+            first_row.setdefault(key, row)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temporary = self.features_path.with_suffix(".tmp.npy")
+        np.save(temporary, features[[first_row[key] for key in unique_keys]])
+        # Release the old mapping before replacing the file under it
+        self.features = None
+        os.replace(temporary, self.features_path)
+
+        self.rows = {key: row for row, key in enumerate(unique_keys)}
+        with open(self.keys_path, "w", encoding="utf-8") as file:
+            json.dump({"params": HOG_PARAMS, "rows": self.rows}, file)
+        self.features = np.load(self.features_path, mmap_mode="r")
+
+
+def train(
+    dataset_dir,
+    output_dir,
+    name="model_svm",
+    cache_dir=None,
+    test_size=0.3,
+    random_state=42,
+    workers=None,
+    promote=False,
+):
+    """
+    Train a linear SVC and publish it as the next version in the registry
+
+    The split and model follow the original notebook: an unstratified
+    70/30 split with random_state 42 and SVC(kernel="linear"). The test
+    split is kept as the version's warm-up set. With promote, the version
+    is also activated, so the pipeline loads it.
+    """
+    from sklearn import svm
+    from sklearn.metrics import classification_report, confusion_matrix
+    from sklearn.model_selection import train_test_split
+
+    started = time.perf_counter()
+    samples = scan_dataset(dataset_dir)
+    if not samples:
+        raise ValueError(f"No training images found in {dataset_dir}")
+    paths = [path for path, _ in samples]
+    labels = np.array([label for _, label in samples])
+
+    keys = [_hash_file(path) for path in paths]
+    cache = FeatureCache(cache_dir or Path(dataset_dir) / ".hog_cache")
+    features, extracted = cache.lookup(keys, paths, workers=workers)
+    feature_time = time.perf_counter() - started
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, labels, test_size=test_size, random_state=random_state
+    )
+    model = svm.SVC(kernel="linear")
+    model.fit(X_train, y_train)
+
+    classifier = compile_linear_svc(model)
+    predicted = classifier.predict(X_test)
+    if not np.array_equal(predicted, np.asarray(model.predict(X_test), dtype=str)):
+        raise ValueError("Compiled classifier disagrees with SVC.predict")
+
+    dataset_hash = hashlib.sha256(
+        "".join(sorted(f"{key}:{label}" for key, label in zip(keys, labels))).encode()
+    ).hexdigest()
+    metrics = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "dataset": {
+            "path": str(dataset_dir),
+            "images": len(samples),
+            "classes": len(set(labels)),
+            "fingerprint": dataset_hash,
+        },
+        "hog": HOG_PARAMS,
+        "split": {"test_size": test_size, "random_state": random_state},
+        "train_accuracy": float(model.score(X_train, y_train)),
+        "test_accuracy": float(np.mean(predicted == y_test)),
+        "report": classification_report(
+            y_test, predicted, output_dict=True, zero_division=0
+        ),
+        "confusion_matrix": {
+            "classes": classifier.classes_.tolist(),
+            "matrix": confusion_matrix(
+                y_test, predicted, labels=classifier.classes_
+            ).tolist(),
+        },
+        "timing": {
+            "features_extracted": extracted,
+            "features_cached": len(samples) - extracted,
+            "feature_seconds": feature_time,
+            "total_seconds": time.perf_counter() - started,
+        },
+    }
+
+    registry = ModelRegistry(output_dir, name)
+    version = registry.publish(classifier, metrics, warmup=(X_test, y_test))
+    if promote:
+        registry.activate(version)
+
+    return registry.path(version), registry.metadata(version)
+
+
+def main():
+    root_dir = Path(__file__).resolve().parent.parent.parent
+    parser = argparse.ArgumentParser(description="Train the OCR character model")
+    parser.add_argument(
+        "--dataset",
+        default=root_dir / "src" / "OCR" / "dataset",
+        help="Directory with one folder of character images per class",
+    )
+    parser.add_argument(
+        "--output",
+        default=root_dir / "data" / "models",
+        help="Directory of the versioned model artifacts",
+    )
+    parser.add_argument("--name", default="model_svm", help="Artifact base name")
+    parser.add_argument(
+        "--cache-dir", help="HOG feature cache (default: <dataset>/.hog_cache)"
+    )
+    parser.add_argument("--workers", type=int, help="Feature extraction processes")
+    parser.add_argument("--test-size", type=float, default=0.3)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument(
+        "--promote",
+        action="store_true",
+        help="Also activate the version, making it the model the pipeline loads",
+    )
+    args = parser.parse_args()
+
+    artifact_path, metrics = train(
+        args.dataset,
+        args.output,
+        name=args.name,
+        cache_dir=args.cache_dir,
+        test_size=args.test_size,
+        random_state=args.random_state,
+        workers=args.workers,
+        promote=args.promote,
+    )
+    timing = metrics["timing"]
+    print(
+        f"Features: {timing['features_extracted']} extracted, "
+        f"{timing['features_cached']} cached ({timing['feature_seconds']:.2f} s)"
+    )
+    print(
+        f"Train accuracy {metrics['train_accuracy']:.3f}, "
+        f"test accuracy {metrics['test_accuracy']:.3f}"
+    )
+    print(f"Wrote {artifact_path} and its metrics")
+
+
+if __name__ == "__main__":
+    main()
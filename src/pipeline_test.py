@@ -35,47 +35,45 @@ arabic_translation_map = {
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 test_dataset_dir = os.path.join(current_dir, '..', 'dataset')
-def run_test(image_path):
+def run_test(controller, image_paths, workers=None):
 
-    controller = GateAccessController(
-        model_path="data/models/model_svm.pkl",
-        authorized_plates=["1 ن ط و"],
-        translation_map=arabic_translation_map,
-    )
+    for image_path, result in zip(
+        image_paths, controller.process_batch(image_paths, workers=workers)
+    ):
+        if result.success:
+            # Get both raw and Arabic versions
+            raw_plate = " ".join(result.characters)
+            arabic_plate = "No Arabic characters detected"
+            if result.arabic_characters:
+                arabic_plate = " ".join(result.arabic_characters)
 
-    path = os.path.join("dataset",image_path)
-    # test_image = cv.imread("tests/test_images/00.jpg")
-    test_image = cv.imread(path)
-    result = controller.process_image(test_image)
+            # print(f"Raw detected plate: {raw_plate}")
+            # print(f"Arabic plate: {arabic_plate}")
+            # with open('output.txt', 'a', encoding='utf-8') as file:
+            #     file.write(f'{image_path} -> {arabic_plate}\n')
+            access_granted = controller.verify_access(arabic_plate)
+            # print(f"Access granted: {access_granted}")
 
-    if result.success:
-        # Get both raw and Arabic versions
-        raw_plate = " ".join(result.characters)
-        arabic_plate = "No Arabic characters detected"
-        if result.arabic_characters:
-            arabic_plate = " ".join(result.arabic_characters)
+            # plt.imshow(cv.cvtColor(result.plate_image, cv.COLOR_BGR2RGB))
+            # plt.show()
 
-        # print(f"Raw detected plate: {raw_plate}")
-        # print(f"Arabic plate: {arabic_plate}")
-        # with open('output.txt', 'a', encoding='utf-8') as file:
-        #     file.write(f'{image_path} -> {arabic_plate}\n')
-        access_granted = controller.verify_access(arabic_plate)
-        # print(f"Access granted: {access_granted}")
+        else:
+            print(f"Error: {result.error_message}")
 
-        # plt.imshow(cv.cvtColor(result.plate_image, cv.COLOR_BGR2RGB))
-        # plt.show()
 
-    else:
-        print(f"Error: {result.error_message}")
+if __name__ == "__main__":
+    controller = GateAccessController(
+        model_path="data/models/model_svm.npz",
+        authorized_plates=["1 ن ط و"],
+        translation_map=arabic_translation_map,
+    )
 
+    image_paths = [
+        os.path.join("dataset", filename) for filename in os.listdir("dataset")[:100]
+    ]
 
-count = 0
-start_time = time.time()
-for filename in os.listdir('dataset'):
-    run_test(filename)
-    count = count + 1
-    if count == 100: 
-        break
-end_time = time.time()
-execution_time = end_time - start_time
-print(f"Execution time: {execution_time:.2f} seconds")
\ No newline at end of file
+    start_time = time.time()
+    run_test(controller, image_paths)
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Execution time: {execution_time:.2f} seconds")
@@ -0,0 +1,244 @@
+"""
+Stream Replay
+Record a camera stream once, then replay it through the streaming pipeline
+to measure end-to-end latency, dropped frames and the time taken to decide
+on each vehicle, without a camera.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from core.motion_gate import MotionGate
+from core.pipeline import GateAccessController
+from core.plate_voting import PlateVoter
+from core.recording import ReplaySource, StreamRecording, record_stream
+from core.result_cache import PlateResultCache
+from core.streaming import StreamingPipeline, StreamStats
+from utils.arabic_plate_translator import ARABIC_TRANSLATION_MAP
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class VehicleDecision:
+    plate_text: Optional[str]
+    access_granted: bool
+    frames_used: int
+    decision_time: float
+
+
+@dataclass
+class ReplayReport:
+    frames_replayed: int
+    wall_time: float
+    stats: StreamStats
+    decisions: List[VehicleDecision] = field(default_factory=list)
+
+    @property
+    def throughput(self):
+        return self.stats.frames_completed / self.wall_time if self.wall_time else 0.0
+
+    def decision_time_percentiles(self):
+        times = [decision.decision_time for decision in self.decisions]
+        if not times:
+            return None
+        return dict(zip(("p50", "p95", "p99"), np.percentile(times, [50, 95, 99])))
+
+    def to_dict(self):
+        report = asdict(self)
+        report["throughput"] = self.throughput
+        report["decision_time"] = self.decision_time_percentiles()
+        return report
+
+
+def replay_recording(
+    controller: GateAccessController,
+    recording: StreamRecording,
+    speed: Optional[float] = 1.0,
+    episode_gap: float = 1.0,
+    **pipeline_options,
+) -> ReplayReport:
+    """
+    Run a recording through a StreamingPipeline and report on it
+
+    A vehicle's decision time runs from the capture of its first processed
+    frame to the completion of the decision. Frames more than episode_gap
+    seconds after the previous processed frame, such as after the motion
+    gate closed without a decision, start a new vehicle.
+    """
+    source = ReplaySource(recording, speed=speed)
+    decisions = []
+    episode = {"start": None, "last_capture": None, "decided_at": float("-inf")}
+    voting = pipeline_options.get("voter") is not None
+
+    def on_result(stream_result):
+        capture_time = stream_result.capture_time
+        if capture_time <= episode["decided_at"]:
+            # Already in flight when the vehicle was decided
+            return
+
+        if (
+            episode["start"] is None
+            or capture_time - episode["last_capture"] > episode_gap
+        ):
+            episode["start"] = capture_time
+        episode["last_capture"] = capture_time
+
+        decided = (
+            stream_result.decision is not None
+            if voting
+            else stream_result.plate_text is not None
+        )
+        if not decided:
+            return
+
+        done = capture_time + stream_result.latency
+        decisions.append(
+            VehicleDecision(
+                plate_text=stream_result.plate_text,
+                access_granted=stream_result.access_granted,
+                frames_used=(
+                    stream_result.decision.frames_used
+                    if stream_result.decision is not None
+                    else 1
+                ),
+                decision_time=done - episode["start"],
+            )
+        )
+        episode["start"] = None
+        episode["decided_at"] = done
+
+    pipeline = StreamingPipeline(
+        controller, source, on_result=on_result, **pipeline_options
+    )
+    start = time.monotonic()
+    pipeline.start()
+    pipeline.join()
+    wall_time = time.monotonic() - start
+
+    return ReplayReport(
+        frames_replayed=source.frames_read,
+        wall_time=wall_time,
+        stats=pipeline.stats(),
+        decisions=decisions,
+    )
+
+
+def print_report(report: ReplayReport):
+    stats = report.stats
+    print(
+        f"Replayed {report.frames_replayed} frames in {report.wall_time:.2f} s: "
+        f"{stats.frames_completed} completed ({report.throughput:.1f} frames/s), "
+        f"{stats.frames_gated} gated, {stats.frames_held} held, "
+        f"{stats.total_dropped} dropped {stats.frames_dropped}"
+    )
+    if stats.latency_p50 is not None:
+        print(
+            f"End-to-end latency p50 {stats.latency_p50 * 1e3:.1f} ms, "
+            f"p95 {stats.latency_p95 * 1e3:.1f} ms, "
+            f"p99 {stats.latency_p99 * 1e3:.1f} ms"
+        )
+
+    percentiles = report.decision_time_percentiles()
+    if percentiles is not None:
+        print(
+            f"{len(report.decisions)} vehicles decided, decision time "
+            f"p50 {percentiles['p50'] * 1e3:.1f} ms, "
+            f"p95 {percentiles['p95'] * 1e3:.1f} ms"
+        )
+    for decision in report.decisions:
+        print(
+            f"  {decision.plate_text}: access "
+            f"{'granted' if decision.access_granted else 'denied'} after "
+            f"{decision.frames_used} frames, {decision.decision_time * 1e3:.1f} ms"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Record camera streams and replay them through the pipeline"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Record a camera, URL or video")
+    record.add_argument("source", help="Camera index, stream URL or video file")
+    record.add_argument("output", help="Recording file to write")
+    record.add_argument("--frames", type=int, help="Stop after this many frames")
+    record.add_argument("--duration", type=float, help="Stop after this many seconds")
+    record.add_argument("--codec", default=".jpg", help=".jpg (default) or .png")
+    record.add_argument("--quality", type=int, default=90, help="JPEG quality")
+
+    replay = commands.add_parser("replay", help="Replay a recording")
+    replay.add_argument("recording", help="Recording file to replay")
+    pacing = replay.add_mutually_exclusive_group()
+    pacing.add_argument(
+        "--speed", type=float, default=1.0, help="Replay speed (default real time)"
+    )
+    pacing.add_argument(
+        "--fast", action="store_true", help="Replay as fast as frames are read"
+    )
+    replay.add_argument(
+        "--model",
+        default=ROOT_DIR / "data" / "models" / "model_svm.npz",
+        help="OCR model to load",
+    )
+    replay.add_argument("--plate", action="append", default=[], help="Authorized plate")
+    replay.add_argument("--queue-size", type=int, default=1)
+    replay.add_argument("--drop-policy", default="latest", choices=("latest", "block"))
+    replay.add_argument("--motion-gate", action="store_true", help="Gate on motion")
+    replay.add_argument("--vote", action="store_true", help="Vote across frames")
+    replay.add_argument("--track", action="store_true", help="Track the plate")
+    replay.add_argument("--cache", action="store_true", help="Cache OCR results")
+    replay.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        source = int(args.source) if args.source.isdigit() else args.source
+        frames = record_stream(
+            source,
+            args.output,
+            max_frames=args.frames,
+            duration=args.duration,
+            codec=args.codec,
+            quality=args.quality,
+        )
+        print(f"Recorded {frames} frames to {args.output}")
+        return 0
+
+    controller = GateAccessController(
+        model_path=str(args.model),
+        authorized_plates=args.plate,
+        translation_map=ARABIC_TRANSLATION_MAP,
+        track_plates=args.track,
+        result_cache=PlateResultCache() if args.cache else None,
+    )
+    controller.logger.setLevel(logging.WARNING)
+
+    with StreamRecording(args.recording) as recording:
+        report = replay_recording(
+            controller,
+            recording,
+            speed=None if args.fast else args.speed,
+            queue_size=args.queue_size,
+            drop_policy=args.drop_policy,
+            motion_gate=MotionGate() if args.motion_gate else None,
+            voter=PlateVoter() if args.vote else None,
+        )
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report.to_dict(), file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
 import cv2 as cv
 import numpy as np
 import matplotlib.pyplot as plt
+from core.motion_gate import MotionGate
 from core.pipeline import GateAccessController
+from core.plate_voting import PlateVoter
+from core.result_cache import PlateResultCache
+from core.streaming import StreamingPipeline
 
 arabic_translation_map = {
     "1": "1",
@@ -33,65 +37,68 @@ arabic_translation_map = {
 }
 
 
-def process_streaming_frame(frame, controller):
-    # Process the frame with the GateAccessController
-    result = controller.process_image(frame)
-    
+def process_streaming_result(stream_result):
+    # Annotate the frame with the decision made by the streaming pipeline
+    frame, result = stream_result.frame, stream_result.result
+
     if result.success:
         raw_plate = " ".join(result.characters)
-        arabic_plate = "No Arabic characters detected"
-        if result.arabic_characters:
-            arabic_plate = " ".join(result.arabic_characters)
-        
+        arabic_plate = " ".join(result.arabic_characters or []) or "No Arabic characters detected"
+
         print(f"Raw detected plate: {raw_plate}")
         print(f"Arabic plate: {arabic_plate}")
-        
-        access_granted = controller.verify_access(arabic_plate)
-        print(f"Access granted: {access_granted}")
-        
+        if stream_result.decision is not None:
+            print(f"Decided plate: {stream_result.plate_text} ({stream_result.decision.confidence:.0%} over {stream_result.decision.frames_used} frames)")
+            print(f"Access granted: {stream_result.access_granted}")
+
         cv.putText(frame, f"Plate: {raw_plate}", (50, 50), cv.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv.LINE_AA)
-        
+
     else:
         print(f"Error: {result.error_message}")
-    
+
     return frame, result.plate_image
 
 def run_test_live():
     controller = GateAccessController(
-        model_path="data/models/model_svm.pkl",
+        model_path="data/models/model_svm.npz",
         authorized_plates=["1 ن ط و"],
         translation_map=arabic_translation_map,
+        track_plates=True,
+        result_cache=PlateResultCache(),
     )
 
-    # Open the video capture (from webcam or video file)
+    # Open the video stream (from webcam or video file)
     IP = "http://192.168.0.127:8080/video"
-    cap = cv.VideoCapture(IP)  # Use '0' for webcam or specify a video file path
+    # Use 0 for webcam or specify a video file path; only frames with motion in the lane are processed
+    pipeline = StreamingPipeline(controller, IP, motion_gate=MotionGate(), voter=PlateVoter())
+    pipeline.start()
 
-    if not cap.isOpened():
-        print("Error: Could not open video stream.")
-        return
-    
     print("Press 'q' to quit.")
+    # Open the window up front, so 'q' is received before the first result
+    cv.namedWindow("Live Stream")
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Failed to grab frame.")
-            break
+    # Poll so the window stays responsive while an empty lane produces no results
+    for stream_result in pipeline.results(timeout=0.03):
+        if stream_result is not None:
+            # Show the freshest result; stale frames are dropped by the pipeline
+            frame, annotated_plate_image = process_streaming_result(stream_result)
+            annotated_plate_image = cv.resize(annotated_plate_image, (frame.shape[1], frame.shape[0]))
 
-        # Process the frame and show the results
-        frame, annotated_plate_image = process_streaming_frame(frame, controller)
-        annotated_plate_image = cv.resize(annotated_plate_image, (frame.shape[1], frame.shape[0]))
+            combined_image = np.vstack((frame, annotated_plate_image))
 
-        combined_image = np.vstack((frame, annotated_plate_image))
+            cv.imshow("Live Stream", combined_image)
 
-        cv.imshow("Live Stream", combined_image)
-        
         # Break the loop if 'q' is pressed
-        if cv.waitKey(30) & 0xFF == ord('q'):
+        if cv.waitKey(1) & 0xFF == ord('q'):
+            pipeline.stop()
             break
-    
-    cap.release()  
-    cv.destroyAllWindows()  
+
+    stats = pipeline.stats()
+    print(f"Frames captured: {stats.frames_captured}, completed: {stats.frames_completed}, gated: {stats.frames_gated}, dropped: {stats.total_dropped}")
+    print(f"OCR cache hit rate: {controller.result_cache.stats().hit_rate:.1%}")
+    if stats.latency_p50 is not None:
+        print(f"Latency p50: {stats.latency_p50 * 1000:.1f} ms, p95: {stats.latency_p95 * 1000:.1f} ms")
+
+    cv.destroyAllWindows()
 
 run_test_live()
@@ -1,5 +1,35 @@
 from typing import Dict, List
 
+# Model class names of the OCR model and the Arabic characters they stand for
+ARABIC_TRANSLATION_MAP = {
+    "1": "1",
+    "2": "2",
+    "3": "3",
+    "4": "4",
+    "5": "5",
+    "6": "6",
+    "7": "7",
+    "8": "8",
+    "9": "9",
+    "Mem": "م",
+    "aen": "ع",
+    "alf": "ا",
+    "ba'": "ب",
+    "dal": "د",
+    "fa'": "ف",
+    "gem": "ج",
+    "ha'": "هـ",
+    "lam": "ل",
+    "noon": "ن",
+    "qaf": "ق",
+    "ra'": "ر",
+    "sad": "ص",
+    "seen": "س",
+    "ta'": "ط",
+    "waw": "و",
+    "ya'": "ي",
+}
+
 
 class ArabicPlateTranslator:
     """Handles translation between model predictions and Arabic characters"""
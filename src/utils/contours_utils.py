@@ -1,3 +1,5 @@
+import heapq
+
 import cv2 as cv
 import numpy as np
 
@@ -36,6 +38,157 @@ def calculate_contour_metrics(contour1, contour2, mode):
     return (abs(center1_x - center2_x), abs(center1_y - center2_y))
 
 
+class ContourBoxes:
+    """
+    Structure-of-arrays view over the bounding boxes of a contour list
+
+    Each slot keeps its box and the indices of the original contours it
+    holds, so point arrays are only concatenated once in ``to_contours``.
+    Slots keep their relative order, matching the list order of the
+    original list-based clustering.
+    """
+
+    def __init__(self, contours):
+        self.contours = contours
+        rects = np.array(
+            [cv.boundingRect(c) for c in contours], dtype=np.int64
+        ).reshape(-1, 4)
+        self.x, self.y, self.width, self.height = rects.T.copy()
+        self.alive = np.ones(len(contours), dtype=bool)
+        self.version = np.zeros(len(contours), dtype=np.int64)
+        self.members = [[i] for i in range(len(contours))]
+
+    def __len__(self):
+        return len(self.contours)
+
+    def starts(self, mode):
+        return self.x if mode == "x" else self.y
+
+    def extents(self, mode):
+        return self.width if mode == "x" else self.height
+
+    def merge(self, index1, index2):
+        """Merge slot index2 into slot index1 (index1 < index2)"""
+        right = max(
+            self.x[index1] + self.width[index1], self.x[index2] + self.width[index2]
+        )
+        bottom = max(
+            self.y[index1] + self.height[index1], self.y[index2] + self.height[index2]
+        )
+        self.x[index1] = min(self.x[index1], self.x[index2])
+        self.y[index1] = min(self.y[index1], self.y[index2])
+        self.width[index1] = right - self.x[index1]
+        self.height[index1] = bottom - self.y[index1]
+
+        self.members[index1].extend(self.members[index2])
+        self.members[index2] = []
+        self.alive[index2] = False
+        self.version[index1] += 1
+
+    def to_contours(self):
+        clustered_contours = []
+        for index in np.flatnonzero(self.alive):
+            members = self.members[index]
+            if len(members) == 1:
+                clustered_contours.append(self.contours[members[0]])
+            else:
+                clustered_contours.append(
+                    np.concatenate([self.contours[m] for m in members], axis=0)
+                )
+        return clustered_contours
+
+
+def pairwise_contour_metrics(boxes, first, second, mode):
+    """
+    Vectorized calculate_contour_metrics over index arrays of box pairs
+
+    ``first`` must precede ``second`` in list order, since the metric is
+    not symmetric.
+    """
+    x1, y1, w1, h1 = (
+        boxes.x[first],
+        boxes.y[first],
+        boxes.width[first],
+        boxes.height[first],
+    )
+    x2, y2, w2, h2 = (
+        boxes.x[second],
+        boxes.y[second],
+        boxes.width[second],
+        boxes.height[second],
+    )
+
+    if mode == "x":
+        swapped = x1 + w1 > x2
+        horizontal_distance = np.abs(
+            np.where(swapped, x1 - (x2 + w2), (x1 + w1) - x2)
+        ).astype(np.float64)
+        vertical_distance = np.abs((y1 + h1 / 2) - (y2 + h2 / 2))
+    elif mode == "y":
+        swapped = y1 + h1 > y2
+        horizontal_distance = np.abs((x1 + w1 / 2) - (x2 + w2 / 2))
+        vertical_distance = np.abs(
+            np.where(swapped, y1 - (y2 + h2), (y1 + h1) - y2)
+        ).astype(np.float64)
+
+    return horizontal_distance, vertical_distance
+
+
+def _candidate_pairs(boxes, first, second, mode, threshold_distance, y_threshold):
+    """Keep the pairs that satisfy the mode condition and are close enough"""
+    horizontal_distance, vertical_distance = pairwise_contour_metrics(
+        boxes, first, second, mode
+    )
+
+    if mode == "x":
+        distance = horizontal_distance
+        condition = vertical_distance <= y_threshold
+    else:
+        distance = vertical_distance
+        condition = horizontal_distance <= 10
+
+    keep = condition & (distance < threshold_distance)
+    return list(
+        zip(distance[keep].tolist(), first[keep].tolist(), second[keep].tolist())
+    )
+
+
+def _sweep_pairs(boxes, mode, threshold_distance):
+    """
+    Sorted sweep over the clustering axis
+
+    The clustering distance is never smaller than the gap between the two
+    box intervals on that axis, so only pairs whose gap is below the
+    threshold can ever be merged.
+    """
+    starts = boxes.starts(mode)
+    ends = starts + boxes.extents(mode)
+    order = np.argsort(starts, kind="stable")
+    sorted_starts = starts[order]
+    stops = np.searchsorted(
+        sorted_starts, ends[order] + threshold_distance, side="left"
+    )
+
+    counts = np.maximum(stops - np.arange(1, len(order) + 1), 0)
+    left = np.repeat(order, counts)
+    offsets = np.repeat(
+        np.arange(1, len(order) + 1) - np.cumsum(counts) + counts, counts
+    )
+    right = order[np.arange(counts.sum()) + offsets]
+
+    return np.minimum(left, right), np.maximum(left, right)
+
+
+def _is_current(boxes, entry):
+    _, index1, index2, version1, version2 = entry
+    return (
+        boxes.alive[index1]
+        and boxes.alive[index2]
+        and boxes.version[index1] == version1
+        and boxes.version[index2] == version2
+    )
+
+
 def agglomerative_cluster(contours, mode, threshold_distance=20, y_threshold=25):
     """
     Generic agglomerative clustering with flexible mode
@@ -43,48 +196,65 @@ def agglomerative_cluster(contours, mode, threshold_distance=20, y_threshold=25)
     Modes:
     - 'x': Horizontal clustering
     - 'y': Vertical clustering
+
+    Repeatedly merges the closest pair (first pair in list order on ties)
+    until no pair is closer than threshold_distance. Candidate pairs come
+    from a sorted sweep and live in a heap; entries made stale by a merge
+    are skipped lazily and replaced by the merged box's new pairs.
     """
-    clustered_contours = contours
+    if len(contours) <= 1:
+        return list(contours)
 
-    while len(clustered_contours) > 1:
-        min_distance = None
-        closest_contour_indices = None
+    boxes = ContourBoxes(contours)
+    first, second = _sweep_pairs(boxes, mode, threshold_distance)
+    heap = [
+        (distance, index1, index2, 0, 0)
+        for distance, index1, index2 in _candidate_pairs(
+            boxes, first, second, mode, threshold_distance, y_threshold
+        )
+    ]
+    heapq.heapify(heap)
 
-        for x in range(len(clustered_contours) - 1):
-            for y in range(x + 1, len(clustered_contours)):
-                horizontal_distance, vertical_distance = calculate_contour_metrics(
-                    clustered_contours[x], clustered_contours[y], mode=mode
-                )
+    while boxes.alive.sum() > 1:
+        while heap and not _is_current(boxes, heap[0]):
+            heapq.heappop(heap)
+        closest = heap[0][:3] if heap else None
 
-                horizontal_condition = (
-                    horizontal_distance <= 10 if mode == "y" else True
-                )
-                vertical_condition = (
-                    vertical_distance <= y_threshold if mode == "x" else True
-                )
-
-                if (min_distance is None and vertical_condition) or (
-                    min_distance is not None
-                    and (horizontal_distance if mode == "x" else vertical_distance)
-                    < min_distance
-                    and vertical_condition
-                    and horizontal_condition
-                ):
-                    min_distance = (
-                        horizontal_distance if mode == "x" else vertical_distance
-                    )
-                    closest_contour_indices = (x, y)
-
-        if min_distance is not None and min_distance < threshold_distance:
-            index1, index2 = closest_contour_indices
-            clustered_contours[index1] = np.concatenate(
-                (clustered_contours[index1], clustered_contours[index2]), axis=0
+        # The first pair in list order is always considered in 'y' mode,
+        # whatever its horizontal distance
+        if mode == "y":
+            index1, index2 = np.flatnonzero(boxes.alive)[:2]
+            _, first_distance = pairwise_contour_metrics(
+                boxes, np.array([index1]), np.array([index2]), mode
             )
-            del clustered_contours[index2]
-        else:
+            first_distance = first_distance[0]
+            if first_distance < threshold_distance and (
+                closest is None or first_distance <= closest[0]
+            ):
+                closest = (first_distance, index1, index2)
+
+        if closest is None:
             break
 
-    return clustered_contours
+        _, index1, index2 = closest
+        boxes.merge(index1, index2)
+
+        others = np.flatnonzero(boxes.alive)
+        others = others[others != index1]
+        for distance, pair1, pair2 in _candidate_pairs(
+            boxes,
+            np.minimum(others, index1),
+            np.maximum(others, index1),
+            mode,
+            threshold_distance,
+            y_threshold,
+        ):
+            heapq.heappush(
+                heap,
+                (distance, pair1, pair2, boxes.version[pair1], boxes.version[pair2]),
+            )
+
+    return boxes.to_contours()
 
 
 # Function to check if two contours intersect
@@ -107,22 +277,32 @@ def check_contours_intersection(cnt1, cnt2, x_threshold=0):
 
 # Function to merge intersecting contours
 def merge_intersecting_contours(contours):
+    if len(contours) == 0:
+        return []
+
+    boxes = ContourBoxes(contours)
+    x, y = boxes.x, boxes.y
+    right, bottom = x + boxes.width, y + boxes.height
+
+    # Same test as check_contours_intersection, for every pair at once
+    intersecting = ~(
+        (right[:, None] < x[None, :])
+        | (right[None, :] < x[:, None])
+        | (bottom[:, None] < y[None, :])
+        | (bottom[None, :] < y[:, None])
+    )
+    np.fill_diagonal(intersecting, False)
+
     merged_contours = []
-    processed_contours = set()
+    processed_contours = np.zeros(len(contours), dtype=bool)
 
     for i, current_contour in enumerate(contours):
-        if i not in processed_contours:
-            merged = current_contour.copy()
-
-            for j, comparison_contour in enumerate(contours):
-                if (
-                    i != j
-                    and j not in processed_contours
-                    and check_contours_intersection(current_contour, comparison_contour)
-                ):
-                    merged = np.concatenate((merged, comparison_contour))
-                    processed_contours.add(j)
-
-            merged_contours.append(merged)
+        if not processed_contours[i]:
+            matches = np.flatnonzero(intersecting[i] & ~processed_contours)
+            processed_contours[matches] = True
+
+            merged_contours.append(
+                np.concatenate([current_contour] + [contours[j] for j in matches])
+            )
 
     return merged_contours
@@ -0,0 +1,96 @@
+"""
+Batched HOG Features
+Compute the HOG descriptor the OCR model was trained on for a whole stack
+of character crops at once, matching skimage.feature.hog bit for bit.
+"""
+
+import cv2 as cv
+import numpy as np
+
+
+def prepare_char_batch(char_images, char_dims=(32, 64)):
+    """Resize character crops to char_dims and stack them as grayscale"""
+    resized = [cv.resize(char_image, char_dims) for char_image in char_images]
+
+    gray = []
+    color = [image for image in resized if image.ndim == 3]
+    if color:
+        # One conversion for every color crop, stacked along the rows
+        converted = cv.cvtColor(np.concatenate(color, axis=0), cv.COLOR_BGR2GRAY)
+        converted = converted.reshape(len(color), char_dims[1], char_dims[0])
+
+    color_index = 0
+    for image in resized:
+        if image.ndim == 3:
+            gray.append(converted[color_index])
+            color_index += 1
+        else:
+            gray.append(image)
+
+    return np.stack(gray)
+
+
+def batch_hog(images, orientations=9, pixels_per_cell=(8, 8), eps=1e-5):
+    """
+    HOG with one-cell blocks and L2-Hys normalization for an (n, rows, cols)
+    stack, equivalent to calling skimage.feature.hog(image, orientations,
+    pixels_per_cell, cells_per_block=(1, 1)) on every image
+
+    skimage accumulates each cell's magnitudes in single precision in
+    row-major order, so the cell sums are accumulated the same way here to
+    produce identical features.
+    """
+    images = np.asarray(images, dtype=np.float64)
+    n_images, size_rows, size_columns = images.shape
+    cell_rows, cell_columns = pixels_per_cell
+    n_cells_rows = size_rows // cell_rows
+    n_cells_columns = size_columns // cell_columns
+
+    # Central differences, zero on the borders
+    gradient_rows = np.zeros_like(images)
+    gradient_columns = np.zeros_like(images)
+    gradient_rows[:, 1:-1, :] = images[:, 2:, :] - images[:, :-2, :]
+    gradient_columns[:, :, 1:-1] = images[:, :, 2:] - images[:, :, :-2]
+
+    magnitude = np.hypot(gradient_columns, gradient_rows)
+    orientation = np.rad2deg(np.arctan2(gradient_rows, gradient_columns)) % 180
+
+    # Bin edges as the single precision bounds skimage compares against
+    edges = (np.float32(180.0 / orientations) * np.arange(orientations + 1)).astype(
+        np.float32
+    )
+    bins = np.searchsorted(edges.astype(np.float64), orientation, side="right") - 1
+
+    # (n, cell row, cell column, pixel within cell, orientation)
+    def to_cells(array):
+        array = array[:, : n_cells_rows * cell_rows, : n_cells_columns * cell_columns]
+        array = array.reshape(
+            n_images, n_cells_rows, cell_rows, n_cells_columns, cell_columns
+        )
+        return array.transpose(0, 1, 3, 2, 4).reshape(
+            n_images, n_cells_rows, n_cells_columns, cell_rows * cell_columns
+        )
+
+    cell_magnitude = to_cells(magnitude)
+    cell_bins = to_cells(bins)
+    contributions = np.where(
+        cell_bins[..., None] == np.arange(orientations), cell_magnitude[..., None], 0.0
+    )
+
+    totals = np.zeros(
+        (n_images, n_cells_rows, n_cells_columns, orientations), dtype=np.float32
+    )
+    for pixel in range(cell_rows * cell_columns):
+        totals = (totals + contributions[:, :, :, pixel, :]).astype(np.float32)
+    histogram = (totals / np.float32(cell_rows * cell_columns)).astype(np.float64)
+
+    # L2-Hys normalization of every one-cell block
+    normalized = histogram / np.sqrt(
+        np.sum(histogram**2, axis=-1, keepdims=True) + eps**2
+    )
+    normalized = np.minimum(normalized, 0.2)
+    normalized = normalized / np.sqrt(
+        np.sum(normalized**2, axis=-1, keepdims=True) + eps**2
+    )
+
+    return normalized.reshape(n_images, -1)
@@ -0,0 +1,13 @@
+"""
+Image Utilities
+Small image helpers shared by the detector and the enhancer.
+"""
+
+import cv2 as cv
+
+
+def resize_to_width(image, width, interpolation=cv.INTER_AREA):
+    """Resize to width keeping the aspect ratio, sized exactly as imutils.resize"""
+    height = image.shape[0]
+    ratio = width / float(image.shape[1])
+    return cv.resize(image, (width, int(height * ratio)), interpolation=interpolation)